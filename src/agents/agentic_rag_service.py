@@ -1,58 +1,175 @@
 # agentic_rag_service.py
-from typing import Dict, Any
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator
+from sqlalchemy import text
 from .llm_client_factory import LLMClientFactory
+from .llm_cache import TTLSQLiteCache
+from .http_transport import RateLimiter, create_http_clients
 from .sql_agent_factory import SQLAgentFactory
+from .sql_executor import ReadOnlySQLExecutor
+from .tool_cache import ToolResultCache, invalidate_on_commit
 from .web_search_agent import WebSearchAgentFactory
 from .supervisor_agent import SupervisorAgentFactory
 from .rag_agent_factory import RagAgentFactory
+from .context_packer import ContextPacker
 from .vector_store_factory import VectorStoreFactory
 from .embedding_service import EmbeddingService
+from .fast_router import FastPathRouter
+from .conversation_memory import ConversationMemory
+from .parallel_fanout import FANOUT_TOOL_NAME, ParallelFanOut
+from .lazy_agent import LazyAgent
 
 from helpers.config import settings
-from helpers.db_connection import SYNC_DATABASE_URL, DATABASE_URL
+from helpers.db_connection import READ_REPLICA, engine, read_engine
+from helpers.pool_metrics import for_consumer
+from helpers.logger import get_logger
+
+logger = get_logger("agentic_rag_service")
 
 class AgenticRAGService:
     def __init__(self):
         self.services: Dict[str, Any] = {}
+        self.timings: Dict[str, float] = {}  # startup phase -> seconds
 
     @classmethod
     async def create(cls) -> "AgenticRAGService":
         self = cls()
-        await self.init_services()
+        with self._phase("total"):
+            await self.init_services()
         return self
 
+    @contextmanager
+    def _phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - started
+            logger.info(f"Startup phase {name} took {self.timings[name]:.2f}s")
+
+    async def _timed(self, name: str, awaitable):
+        with self._phase(name):
+            return await awaitable
+
     async def init_services(self) -> None:
+        # LLM response cache (deterministic completions only)
+        llm_cache = None
+        if settings.LLM_CACHE_ENABLED and settings.TEMPERATURE == 0:
+            llm_cache = TTLSQLiteCache(
+                database_path=settings.LLM_CACHE_PATH,
+                ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+                max_entries=settings.LLM_CACHE_MAX_ENTRIES
+            )
+
+        # Shared HTTP pools + client-side rate limits, one per model provider
+        llm_http, llm_async_http = create_http_clients(RateLimiter(
+            "llm",
+            requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY
+        ))
+        embedding_http, embedding_async_http = create_http_clients(RateLimiter(
+            "embeddings",
+            requests_per_minute=settings.EMBEDDING_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.EMBEDDING_TOKENS_PER_MINUTE,
+            max_concurrency=settings.EMBEDDING_MAX_CONCURRENCY
+        ))
+
         # LLM client
         llm_client = LLMClientFactory(
             api_key=settings.GROQ_API_KEY,
             base_url=settings.GROQ_BASE_URL
-        ).create_client(model=settings.GROQ_MODEL, temperature=settings.TEMPERATURE)
+        ).create_client(
+            model=settings.GROQ_MODEL,
+            temperature=settings.TEMPERATURE,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            max_retries=settings.LLM_MAX_RETRIES,
+            cache=llm_cache,
+            http_client=llm_http,
+            http_async_client=llm_async_http
+        )
         self.services["llm_client"] = llm_client
 
         # Embedding service
         embedding_svc = EmbeddingService(
             base_url=settings.OLLAMA_BASE_URL,
             api_key=settings.OLLAMA_API_KEY,
-            model_name=settings.OLLAMA_MODEL
+            model_name=settings.OLLAMA_MODEL,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            http_client=embedding_http,
+            http_async_client=embedding_async_http
         )
         self.services["embedding_service"] = embedding_svc
 
-        # Vector store (async)
-        vector_store = await VectorStoreFactory(
-            connection_string=DATABASE_URL,
-            table_name=settings.VECTOR_TABLE,
-            embedding_service=embedding_svc,
-            vector_size=768
-        ).create_vector_store()
+        # Tool result caches; SQL results are dropped when the app commits writes to their tables
+        sql_tool_cache = web_tool_cache = None
+        if settings.TOOL_CACHE_ENABLED:
+            sql_tool_cache = ToolResultCache(
+                "sql", ttl_seconds=settings.SQL_TOOL_CACHE_TTL_SECONDS, max_entries=settings.TOOL_CACHE_MAX_ENTRIES
+            )
+            web_tool_cache = ToolResultCache(
+                "web", ttl_seconds=settings.WEB_TOOL_CACHE_TTL_SECONDS, max_entries=settings.TOOL_CACHE_MAX_ENTRIES
+            )
+            invalidate_on_commit(engine.sync_engine, [sql_tool_cache])
+
+        # The vector store and the SQL agent share the app's pools; their
+        # checkouts are reported per consumer by pool_metrics. The SQL agent
+        # only reads, so it runs on the read replica when there is one
+        sql_executor = ReadOnlySQLExecutor(
+            for_consumer(read_engine, "sql_agent"),
+            statement_timeout_ms=settings.SQL_STATEMENT_TIMEOUT_MS,
+            max_plan_cost=settings.SQL_MAX_PLAN_COST,
+            max_plan_rows=settings.SQL_MAX_PLAN_ROWS,
+            max_result_rows=settings.SQL_MAX_RESULT_ROWS,
+            max_concurrency=settings.SQL_AGENT_MAX_CONCURRENCY,
+            role=settings.SQL_AGENT_DB_ROLE,
+        )
+        self.services["sql_executor"] = sql_executor
+        sql_agent_factory = SQLAgentFactory(
+            sql_executor, llm_client,
+            allowed_columns=settings.SQL_AGENT_ALLOWED_COLUMNS,
+            sample_rows=settings.SQL_SCHEMA_SAMPLE_ROWS,
+            schema_refresh_seconds=settings.SQL_SCHEMA_REFRESH_SECONDS,
+            tool_cache=sql_tool_cache
+        )
+
+        # Independent I/O-bound steps run concurrently: vector store table
+        # check / creation and the SQL agent's schema snapshot
+        vector_store, sql_agent = await asyncio.gather(
+            self._timed("vector_store", VectorStoreFactory(
+                engine=for_consumer(engine, "vector_store"),
+                table_name=settings.VECTOR_TABLE,
+                embedding_service=embedding_svc,
+                vector_size=768
+            ).create_vector_store()),
+            self._timed("sql_agent", sql_agent_factory.build_agent()),
+        )
         self.services["vector_store"] = vector_store
 
         # Agents
-        rag_agent = RagAgentFactory(vector_store, llm_client).get_rag_agent()
-        sql_agent = SQLAgentFactory(SYNC_DATABASE_URL, llm_client).build_agent()
-        web_agent = WebSearchAgentFactory(llm_client).get_agent()
+        context_packer = ContextPacker(
+            token_budget=settings.RAG_CONTEXT_TOKEN_BUDGET,
+            max_distance=settings.RAG_MAX_DISTANCE
+        )
+        rag_retriever = RagAgentFactory(
+            vector_store, llm_client,
+            context_packer=context_packer,
+            tool_timeout=settings.RAG_TOOL_TIMEOUT_SECONDS
+        )
+        rag_agent = rag_retriever.get_rag_agent()
+
+        # The web agent is the supervisor's last resort; build it on first use
+        web_agent_factory = WebSearchAgentFactory(llm_client, tool_cache=web_tool_cache)
+        if "web_agent" in settings.LAZY_AGENTS:
+            web_agent = LazyAgent(web_agent_factory.name, web_agent_factory.get_agent)
+        else:
+            web_agent = web_agent_factory.get_agent()
 
         self.services.update({
             "rag_agent": rag_agent,
+            "rag_retriever": rag_retriever,
             "sql_agent": sql_agent,
             "web_agent": web_agent
         })
@@ -87,7 +204,7 @@ Routing Rules:
 - If the query asks about the system database (users, orders, products), call sql_agent first.
 - Only call web_agent if neither RAG nor SQL can answer.
 - If the query is ambiguous (could be database or resume), call rag_agent and sql_agent in parallel and combine results.
-
+{fanout_rule}
 - If the query has multiple components (e.g., database + document question), call each necessary agent separately and combine results into a single, concise final answer.
 - After each agent call, assess if the answer is complete. Escalate to the next agent if needed.
 - Always include the name of the agent that generated each part of the answer.
@@ -126,14 +243,90 @@ Constraints:
 - Always output in structured JSON format.
 - Always include the names of all agents that contributed to the answer.
 """
+        supervisor_tools = []
+        fanout_rule = ""
+        if settings.FANOUT_ENABLED:
+            fanout = ParallelFanOut(
+                agents={"rag_agent": rag_agent, "sql_agent": sql_agent},
+                branch_timeout=settings.FANOUT_BRANCH_TIMEOUT_SECONDS,
+            )
+            supervisor_tools.append(fanout.get_tool())
+            fanout_rule = (
+                f"  To do so, make ONE call to {FANOUT_TOOL_NAME} with agents [\"rag_agent\", \"sql_agent\"] "
+                "instead of transferring to each agent; it runs both at once and returns both answers.\n"
+            )
+
         supervisor_agent = SupervisorAgentFactory(
             agents=[rag_agent, sql_agent, web_agent],
             model=llm_client,
-            system_prompt=supervisor_prompt,
+            system_prompt=supervisor_prompt.replace("{fanout_rule}", fanout_rule),
             name="main_supervisor",
             output_mode="last_message",
+            tools=supervisor_tools,
         ).build()
         self.services["supervisor_agent"] = supervisor_agent
 
+        # Fast-path router (optional; the supervisor handles everything without it),
+        # built while the connections are warmed up
+        async def build_fast_router():
+            if not settings.FAST_ROUTER_ENABLED:
+                return None
+            try:
+                return await FastPathRouter(
+                    embedding_service=embedding_svc,
+                    agents={"rag_agent": rag_agent, "sql_agent": sql_agent, "web_agent": web_agent},
+                    examples=settings.FAST_ROUTER_EXAMPLES,
+                    threshold=settings.FAST_ROUTER_THRESHOLD,
+                    margin=settings.FAST_ROUTER_MARGIN,
+                ).build()
+            except Exception as e:
+                logger.warning(f"Fast-path router disabled, could not embed examples - {str(e)}")
+                return None
+
+        if settings.STARTUP_WARMUP_ENABLED:
+            fast_router, _ = await asyncio.gather(
+                self._timed("fast_router", build_fast_router()),
+                self._timed("warm_up", self.warm_up(embedding_svc, llm_async_http)),
+            )
+        else:
+            fast_router = await self._timed("fast_router", build_fast_router())
+        self.services["fast_router"] = fast_router
+
+        # Conversation history for multi-turn /query
+        self.services["conversation_memory"] = ConversationMemory(
+            llm_client,
+            max_turns=settings.HISTORY_MAX_TURNS,
+            token_budget=settings.HISTORY_TOKEN_BUDGET,
+            summarize_every=settings.HISTORY_SUMMARIZE_EVERY
+        )
+
+    async def warm_up(self, embedding_service, llm_async_http) -> None:
+        """
+        Open pooled DB connections and the model providers' HTTP connections
+        before traffic arrives, so the first requests skip connection setup.
+        Failures are logged; the first real request will retry.
+        """
+        async def ping_pool(pool_engine, connections: int):
+            async def ping():
+                async with pool_engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+            await asyncio.gather(*(ping() for _ in range(connections)))
+
+        steps = {
+            "db_pool": ping_pool(engine, settings.STARTUP_WARMUP_DB_CONNECTIONS),
+            **({"read_db_pool": ping_pool(read_engine, settings.STARTUP_WARMUP_DB_CONNECTIONS)} if READ_REPLICA else {}),
+            "embeddings": embedding_service.aembed_query("warm-up"),
+            # Lists models instead of completing, to open the connection without spending tokens
+            "llm": llm_async_http.get(
+                f"{settings.GROQ_BASE_URL.rstrip('/')}/models",
+                headers={"Authorization": f"Bearer {settings.GROQ_API_KEY}"},
+                timeout=settings.LLM_TIMEOUT_SECONDS,
+            ),
+        }
+        results = await asyncio.gather(*(self._timed(f"warm_up.{name}", step) for name, step in steps.items()), return_exceptions=True)
+        for name, result in zip(steps, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"Warm-up step {name} failed - {str(result)}")
+
     def get_service(self, name: str) -> Any:
         return self.services.get(name)
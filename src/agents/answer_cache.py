@@ -0,0 +1,146 @@
+# answer_cache.py
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from helpers.config import settings
+from helpers.logger import get_logger
+
+logger = get_logger("answer_cache")
+
+CHANNEL = "answer_cache_invalidate"
+
+
+class _ScopeEntries:
+    """
+    Cached answers of a single project, stored as a matrix of unit-length
+    question embeddings so a lookup is one matrix-vector product.
+    """
+
+    def __init__(self):
+        self.vectors: Optional[np.ndarray] = None
+        self.answers: List[Dict[str, Any]] = []
+        self.created_at: List[float] = []
+
+    def prune(self, ttl_seconds: int, max_entries: int) -> None:
+        now = time.monotonic()
+        keep = [i for i, ts in enumerate(self.created_at) if now - ts < ttl_seconds][-max_entries:]
+        if len(keep) == len(self.created_at):
+            return
+        self.vectors = self.vectors[keep] if keep else None
+        self.answers = [self.answers[i] for i in keep]
+        self.created_at = [self.created_at[i] for i in keep]
+
+
+class SemanticAnswerCache:
+    """
+    Process-local cache of answers per project. Only project-scoped answers
+    are cached: an unscoped search spans every tenant's documents. Document
+    and project writes send a NOTIFY when their transaction commits, and
+    every worker drops that project's answers. While a worker's listener is
+    down it may miss them, so nothing is served or stored until it is back.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        ttl_seconds: int = 900,
+        max_entries: int = 500,  # per project
+        skip_agents: Iterable[str] = (),  # answers read live data only document writes don't invalidate
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.skip_agents = set(skip_agents)
+        self._scopes: Dict[str, _ScopeEntries] = {}
+        self._listen = False
+        self._listening = False
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        arr = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(arr)
+        return arr / norm if norm else arr
+
+    def _serving(self) -> bool:
+        return not self._listen or self._listening
+
+    def lookup(self, scope: str, vector: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached answer of the most similar previous question in this
+        scope, or None if nothing is above the similarity threshold.
+        """
+        entries = self._scopes.get(scope) if self._serving() else None
+        if entries is None:
+            return None
+
+        entries.prune(self.ttl_seconds, self.max_entries)
+        if entries.vectors is None:
+            return None
+
+        similarities = entries.vectors @ self._normalize(vector)
+        best = int(np.argmax(similarities))
+        score = float(similarities[best])
+        if score < self.similarity_threshold:
+            logger.info(f"Answer cache miss [scope={scope}, best_similarity={score:.3f}]")
+            return None
+
+        logger.info(f"Answer cache hit [scope={scope}, similarity={score:.3f}]")
+        return entries.answers[best]
+
+    def store(self, scope: str, vector: List[float], answer: Dict[str, Any], agents: Iterable[str] = ()) -> None:
+        """
+        Cache answer under the question's vector, unless one of the agents
+        that produced it is in skip_agents: their tables and web results
+        change without invalidating this cache (they have their own tool caches).
+        """
+        if not scope or not self._serving():
+            return
+        skipped = self.skip_agents.intersection(agents)
+        if skipped:
+            logger.info(f"Answer not cached [scope={scope}, agents={sorted(skipped)}]")
+            return
+        entries = self._scopes.setdefault(scope, _ScopeEntries())
+        row = self._normalize(vector)[np.newaxis, :]
+        entries.vectors = row if entries.vectors is None else np.vstack([entries.vectors, row])
+        entries.answers.append(answer)
+        entries.created_at.append(time.monotonic())
+        entries.prune(self.ttl_seconds, self.max_entries)
+
+    def invalidate(self, scope: str) -> None:
+        """Drop every cached answer of a project in this worker."""
+        if self._scopes.pop(scope, None):
+            logger.info(f"Answer cache invalidated [scope={scope}]")
+
+    def clear(self) -> None:
+        self._scopes.clear()
+
+    # ------------------------- Cross-worker invalidation -------------------------
+    async def notify(self, db: AsyncSession, scope: str) -> None:
+        """
+        Drop scope's answers here and in every worker once db's transaction
+        commits. Call inside the write's unit of work, before the commit.
+        """
+        await db.execute(text("SELECT pg_notify(:channel, :scope)"), {"channel": CHANNEL, "scope": scope})
+        event.listen(db.sync_session, "after_commit", lambda _: self.invalidate(scope), once=True)
+
+    def _set_listening(self, listening: bool) -> None:
+        # Connect or disconnect: anything cached may have missed an invalidation
+        self.clear()
+        self._listening = listening
+
+    def listen_on(self, listener) -> None:
+        """Receive other workers' invalidations through listener (helpers.project_cache); call before it starts."""
+        self._listen = True
+        listener.subscribe(CHANNEL, self.invalidate, self._set_listening)
+
+
+answer_cache = SemanticAnswerCache(
+    similarity_threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+    ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+    max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+    skip_agents=settings.ANSWER_CACHE_SKIP_AGENTS,
+)
@@ -0,0 +1,155 @@
+# context_packer.py
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from helpers.logger import get_logger
+
+logger = get_logger("context_packer")
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text; good enough for budgeting
+    return (len(text) + 3) // 4
+
+
+class _Passage:
+    def __init__(self, doc: Document, distance: float):
+        self.text = doc.page_content
+        self.metadata = dict(doc.metadata)
+        self.distance = distance
+        self.start = doc.metadata.get("start_index")
+
+    @property
+    def source(self) -> Any:
+        return self.metadata.get("source")
+
+    @property
+    def page(self) -> Any:
+        return self.metadata.get("page")
+
+    @property
+    def end(self) -> Optional[int]:
+        return None if self.start is None else self.start + len(self.text)
+
+
+class ContextPacker:
+    """
+    Turns scored retrieval hits into a compact, citation-tagged context string:
+    drops weak hits, stitches overlapping chunks of the same document back
+    together, removes repeated text and stops at a token budget.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 1500,
+        max_distance: Optional[float] = None,  # cosine distance; hits above it are dropped
+        min_overlap_chars: int = 20,
+        max_overlap_chars: int = 400,
+    ):
+        self.token_budget = token_budget
+        self.max_distance = max_distance
+        self.min_overlap_chars = min_overlap_chars
+        self.max_overlap_chars = max_overlap_chars
+
+    # ------------------------- Merging -------------------------
+    def _text_overlap(self, left: str, right: str) -> int:
+        """Length of the longest suffix of `left` that is a prefix of `right`."""
+        longest = min(len(left), len(right), self.max_overlap_chars)
+        for size in range(longest, self.min_overlap_chars - 1, -1):
+            if left.endswith(right[:size]):
+                return size
+        return 0
+
+    def _try_merge(self, left: _Passage, right: _Passage) -> bool:
+        if left.start is not None and right.start is not None:
+            if right.start > left.end:
+                return False
+            overlap = left.end - right.start
+        else:
+            # without offsets the retrieval order says nothing about document order
+            overlap = self._text_overlap(left.text, right.text)
+            if not overlap:
+                overlap = self._text_overlap(right.text, left.text)
+                if not overlap:
+                    return False
+                left.text = right.text + left.text[overlap:]
+                left.distance = min(left.distance, right.distance)
+                return True
+
+        # when right is fully contained in left there is nothing to append
+        if overlap < len(right.text):
+            left.text += right.text[overlap:]
+        left.distance = min(left.distance, right.distance)
+        return True
+
+    def _merge_adjacent(self, passages: List[_Passage]) -> List[_Passage]:
+        groups: Dict[Tuple[Any, Any], List[_Passage]] = {}
+        for passage in passages:
+            groups.setdefault((passage.source, passage.page), []).append(passage)
+
+        merged = []
+        for group in groups.values():
+            group.sort(key=lambda p: (p.start is None, p.start or 0))
+            current = group[0]
+            for nxt in group[1:]:
+                if not self._try_merge(current, nxt):
+                    merged.append(current)
+                    current = nxt
+            merged.append(current)
+        return merged
+
+    def _dedupe(self, passages: List[_Passage]) -> List[_Passage]:
+        kept: List[_Passage] = []
+        for passage in sorted(passages, key=lambda p: len(p.text), reverse=True):
+            normalized = " ".join(passage.text.split())
+            if any(normalized in " ".join(k.text.split()) for k in kept):
+                continue
+            kept.append(passage)
+        return kept
+
+    # ------------------------- Formatting -------------------------
+    def _citation(self, index: int, passage: _Passage) -> str:
+        label = Path(str(passage.source)).name if passage.source else "document"
+        if isinstance(passage.page, int):
+            label += f" p.{passage.page + 1}"
+        return f"[{index}] {label}"
+
+    def pack(self, hits: List[Tuple[Document, float]]) -> Tuple[str, List[Document]]:
+        """
+        Pack (document, distance) hits into a context string that fits the
+        token budget. Returns the context and the packed passages as documents.
+        """
+        raw_tokens = sum(
+            estimate_tokens(f"Source: {doc.metadata}\nContent: {doc.page_content}") for doc, _ in hits
+        )
+
+        total_hits = len(hits)
+        if self.max_distance is not None:
+            hits = [(doc, distance) for doc, distance in hits if distance <= self.max_distance]
+
+        passages = self._dedupe(self._merge_adjacent([_Passage(doc, distance) for doc, distance in hits]))
+        passages.sort(key=lambda p: p.distance)
+
+        blocks, packed_docs, used_tokens = [], [], 0
+        for passage in passages:
+            citation = self._citation(len(blocks) + 1, passage)
+            remaining = self.token_budget - used_tokens - estimate_tokens(citation) - 1
+            if remaining <= 0:
+                break
+            text = passage.text
+            if estimate_tokens(text) > remaining:
+                text = text[: remaining * 4].rsplit(" ", 1)[0] + " …"
+            block = f"{citation}\n{text}"
+            blocks.append(block)
+            packed_docs.append(Document(page_content=text, metadata={**passage.metadata, "distance": passage.distance}))
+            used_tokens += estimate_tokens(block)
+
+        context = "\n\n".join(blocks)
+        packed_tokens = estimate_tokens(context)
+        logger.info(
+            f"Packed {total_hits} hit(s) ({total_hits - len(hits)} over distance cutoff) into {len(blocks)} passage(s): "
+            f"~{packed_tokens} tokens (raw ~{raw_tokens}, saved ~{max(raw_tokens - packed_tokens, 0)})"
+        )
+        return context, packed_docs
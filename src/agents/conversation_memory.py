@@ -0,0 +1,105 @@
+# conversation_memory.py
+import asyncio
+from typing import Any, Dict, List, Optional, Set
+from uuid import UUID
+
+from .context_packer import estimate_tokens
+from helpers.db_connection import async_session, unit_of_work
+from helpers.logger import get_logger
+from models.postgres.UserHistoryModel import UserHistoryModel
+from models.postgres.operations_schema.history import ConversationSummaryOut, ConversationTurnOut
+
+logger = get_logger("conversation_memory")
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and an assistant. "
+    "Merge the existing summary with the new turns into one short summary that keeps facts, "
+    "names, numbers and open questions the user may refer back to. Reply with the summary only."
+)
+
+
+class ConversationMemory:
+    """
+    Per (user, project) conversation context for /query: the last turns that
+    fit in max_turns and token_budget, preceded by a rolling summary of older
+    turns. Turns are appended one row at a time; the summary is refreshed in
+    the background once summarize_every turns have fallen out of the window,
+    and until then those turns are still loaded verbatim.
+    """
+
+    def __init__(
+        self,
+        llm_client: Any,
+        max_turns: int = 6,
+        token_budget: int = 1000,
+        summarize_every: int = 6,
+    ):
+        self.llm_client = llm_client
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.summarize_every = summarize_every
+        self.history_model = UserHistoryModel()
+        self._background: Set[asyncio.Task] = set()
+        self._summarizing: Set[tuple] = set()  # (user, project) with a refresh in flight
+
+    def _window(self, turns: List[ConversationTurnOut]) -> List[ConversationTurnOut]:
+        # Newest turns first until the token budget is spent
+        kept, used = [], 0
+        for turn in reversed(turns):
+            cost = estimate_tokens(turn.question) + estimate_tokens(turn.answer)
+            if kept and used + cost > self.token_budget:
+                break
+            kept.append(turn)
+            used += cost
+        return kept[::-1]
+
+    async def load(self, db, user_id: UUID, project_id: UUID) -> List[Dict[str, str]]:
+        """Return the conversation context as chat messages (empty for a new conversation)."""
+        summary = await self.history_model.get_summary(db, user_id, project_id)
+        summarized_upto = summary.last_seq if summary else 0
+        # The last max_turns turns, plus older ones the summary does not cover
+        # yet (up to summarize_every of them wait for the next refresh)
+        recent = await self.history_model.get_history(db, user_id, project_id, limit=self.max_turns + self.summarize_every)
+        cutoff = len(recent) - self.max_turns
+        turns = self._window([t for i, t in enumerate(recent) if i >= cutoff or t.seq > summarized_upto])
+
+        messages = []
+        if summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary.summary}"})
+        for turn in turns:
+            messages.append({"role": "user", "content": turn.question})
+            messages.append({"role": "assistant", "content": turn.answer})
+        return messages
+
+    async def record(self, db, user_id: UUID, project_id: UUID, question: str, answer: str) -> None:
+        turn = await self.history_model.append_turn(db, user_id, project_id, question, answer)
+
+        summary = await self.history_model.get_summary(db, user_id, project_id)
+        summarized_upto = summary.last_seq if summary else 0
+        outside_window = turn.seq - self.max_turns
+        key = (user_id, project_id)
+        if outside_window - summarized_upto >= self.summarize_every and key not in self._summarizing:
+            self._summarizing.add(key)
+            task = asyncio.create_task(self._refresh_summary(user_id, project_id, summary, outside_window))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+            task.add_done_callback(lambda _: self._summarizing.discard(key))
+
+    async def _refresh_summary(self, user_id: UUID, project_id: UUID, summary: Optional[ConversationSummaryOut], upto_seq: int) -> None:
+        # Runs after the response; uses its own session since the request's is gone
+        after_seq = summary.last_seq if summary else 0
+        try:
+            async with async_session() as db:
+                turns = await self.history_model.get_turns_range(db, user_id, project_id, after_seq, upto_seq)
+                if not turns:
+                    return
+                transcript = "\n".join(f"User: {t.question}\nAssistant: {t.answer}" for t in turns)
+                result = await self.llm_client.ainvoke([
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": f"Existing summary:\n{summary.summary if summary else '(none)'}\n\nNew turns:\n{transcript}"},
+                ])
+                async with unit_of_work(db):
+                    await self.history_model.upsert_summary(db, user_id, project_id, result.content, turns[-1].seq)
+                logger.info(f"Summarized turns {after_seq + 1}..{turns[-1].seq} [user={user_id}, project={project_id}]")
+        except Exception as e:
+            logger.warning(f"Conversation summary refresh failed [user={user_id}, project={project_id}] - {str(e)}")
@@ -1,11 +1,22 @@
+import httpx
 import openai
 from typing import List, Optional
 from langchain.embeddings.base import Embeddings  # check version and path!
 
 class EmbeddingService(Embeddings):
-    def __init__(self, base_url: str, api_key: str, model_name: str, max_retries: int = 3):
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        model_name: str,
+        max_retries: int = 3,
+        timeout: Optional[float] = None,
+        http_client: Optional[httpx.Client] = None,  # shared, rate-limited transport
+        http_async_client: Optional[httpx.AsyncClient] = None,
+    ):
         # Initialize your client
-        self.client = openai.OpenAI(base_url=base_url, api_key=api_key)
+        self.client = openai.OpenAI(base_url=base_url, api_key=api_key, timeout=timeout, http_client=http_client)
+        self.async_client = openai.AsyncOpenAI(base_url=base_url, api_key=api_key, timeout=timeout, http_client=http_async_client)
         self.model_name = model_name
         self.max_retries = max_retries
         # Optionally: determine embedding dimension up front
@@ -32,3 +43,23 @@ class EmbeddingService(Embeddings):
         if self.embedding_dim is None and vectors:
             self.embedding_dim = len(vectors[0])
         return vectors
+
+    async def aembed_query(self, text: str) -> List[float]:
+        response = await self.async_client.embeddings.create(
+            model=self.model_name,
+            input=[text]
+        )
+        vector = response.data[0].embedding
+        if self.embedding_dim is None:
+            self.embedding_dim = len(vector)
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        response = await self.async_client.embeddings.create(
+            model=self.model_name,
+            input=texts
+        )
+        vectors = [item.embedding for item in response.data]
+        if self.embedding_dim is None and vectors:
+            self.embedding_dim = len(vectors[0])
+        return vectors
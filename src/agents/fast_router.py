@@ -0,0 +1,105 @@
+# fast_router.py
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from helpers.logger import get_logger
+
+logger = get_logger("fast_router")
+
+# Labeled example questions per sub-agent; their embeddings are averaged into
+# one centroid per agent. Keep them in line with the supervisor prompt, and the
+# sql_agent ones with the tables it can query (SQL_AGENT_ALLOWED_COLUMNS).
+# FAST_ROUTER_EXAMPLES overrides them.
+DEFAULT_ROUTE_EXAMPLES: Dict[str, List[str]] = {
+    "rag_agent": [
+        "Summarize Ahmed's resume.",
+        "What skills are listed in the resume?",
+        "What does the report say about the project results?",
+        "According to the uploaded documents, what are the main findings?",
+        "Which companies has Ahmed worked for according to his CV?",
+        "Explain the methodology described in the document.",
+    ],
+    "sql_agent": [
+        "How many users registered last month?",
+        "How many admins are in the system?",
+        "List all projects created this year.",
+        "Which users are members of the project named finance?",
+        "How many documents have been uploaded to each project?",
+        "Which documents are not processed yet?",
+        "Which project has the most flushed documents?",
+    ],
+    "web_agent": [
+        "What is the latest news about AI?",
+        "What is the weather forecast for tomorrow?",
+        "Who won the football match yesterday?",
+        "What is the current price of bitcoin?",
+        "Search the web for recent releases of Python.",
+    ],
+}
+
+
+class FastPathRouter:
+    """
+    Local pre-router in front of the supervisor. A question whose embedding is
+    close enough to one agent's centroid (and clearly closer than to the
+    runner-up) goes straight to that agent, skipping the supervisor's LLM hop.
+    """
+
+    def __init__(
+        self,
+        embedding_service: Any,
+        agents: Dict[str, Any],
+        examples: Dict[str, List[str]] = None,
+        threshold: float = 0.75,
+        margin: float = 0.05,
+    ):
+        self.embedding_service = embedding_service
+        self.agents = agents
+        self.examples = examples or DEFAULT_ROUTE_EXAMPLES
+        self.threshold = threshold
+        self.margin = margin
+        self.labels: List[str] = []
+        self.centroids: Optional[np.ndarray] = None
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        return matrix / np.maximum(np.linalg.norm(matrix, axis=-1, keepdims=True), 1e-12)
+
+    async def build(self) -> "FastPathRouter":
+        labels = [label for label in self.examples if label in self.agents]
+        texts = [text for label in labels for text in self.examples[label]]
+        vectors = self._normalize(np.asarray(await self.embedding_service.aembed_documents(texts), dtype=np.float32))
+
+        centroids, start = [], 0
+        for label in labels:
+            end = start + len(self.examples[label])
+            centroids.append(vectors[start:end].mean(axis=0))
+            start = end
+
+        self.labels = labels
+        self.centroids = self._normalize(np.stack(centroids))
+        logger.info(f"Fast-path router ready with {len(labels)} centroids from {len(texts)} examples")
+        return self
+
+    def route(self, query_vector: List[float]) -> Tuple[Optional[str], float]:
+        """
+        Return (agent_name, confidence), or (None, confidence) when the
+        question should go through the supervisor.
+        """
+        if self.centroids is None:
+            return None, 0.0
+
+        query = self._normalize(np.asarray(query_vector, dtype=np.float32))
+        scores = self.centroids @ query
+        order = np.argsort(scores)[::-1]
+        best = float(scores[order[0]])
+        runner_up = float(scores[order[1]]) if len(order) > 1 else -1.0
+        label = self.labels[order[0]]
+
+        if best >= self.threshold and best - runner_up >= self.margin:
+            logger.info(f"Fast-path route -> {label} (confidence={best:.3f}, margin={best - runner_up:.3f})")
+            return label, best
+
+        logger.info(f"Fast-path declined, best={label} (confidence={best:.3f}, margin={best - runner_up:.3f})")
+        return None, best
@@ -0,0 +1,248 @@
+# http_transport.py
+import asyncio
+import json
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+import httpx
+
+from helpers.logger import get_logger
+
+logger = get_logger("http_transport")
+
+
+class _TokenBucket:
+    """Refills `per_minute` units per minute, holding at most one minute's worth."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """
+    Client-side budget for one model provider: token buckets for requests per
+    minute and (estimated) tokens per minute, plus an adaptive cap on
+    concurrent requests that halves on every 429 and grows back additively on
+    success. A 429's Retry-After pauses all requests to the provider.
+    Thread-safe, so sync calls made from tool threads share the same budget.
+    A per-minute budget of 0 disables that bucket.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        max_concurrency: int = 8,
+        min_concurrency: int = 1,
+    ):
+        self.name = name
+        self.requests = _TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = _TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = float(max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Reserve a slot; return 0 on success, else the seconds to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.in_flight >= int(self.concurrency):
+                return 0.05
+
+            wait = max(
+                self.requests.wait_time(1, now) if self.requests else 0.0,
+                self.tokens.wait_time(tokens, now) if self.tokens else 0.0,
+            )
+            if wait > 0:
+                return wait
+
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(tokens)
+            self.in_flight += 1
+            return 0.0
+
+    def acquire(self, tokens: int) -> None:
+        """Blocking variant for sync clients in worker threads; never on an event loop thread."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            raise RuntimeError(f"{self.name}: blocking rate limit wait on the event loop thread; use the async client")
+        while (wait := self._try_acquire(tokens)) > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int) -> None:
+        while (wait := self._try_acquire(tokens)) > 0:
+            await asyncio.sleep(wait)
+
+    def release(self, status_code: Optional[int], retry_after: Optional[float] = None) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if status_code == 429:
+                self.concurrency = max(float(self.min_concurrency), self.concurrency / 2)
+                self.paused_until = max(self.paused_until, time.monotonic() + (retry_after or 1.0))
+                logger.warning(
+                    f"{self.name}: rate limited by provider; concurrency -> {int(self.concurrency)}, "
+                    f"pausing {retry_after or 1.0:.1f}s"
+                )
+            elif status_code is not None and status_code < 500:
+                self.concurrency = min(float(self.max_concurrency), self.concurrency + 1.0 / self.concurrency)
+
+
+def estimate_request_tokens(request: httpx.Request, completion_tokens: int = 256) -> int:
+    """Rough prompt + completion size of an OpenAI-style JSON request (chars / 4)."""
+    try:
+        body = json.loads(request.content or b"{}")
+    except (ValueError, httpx.RequestNotRead):
+        return 1
+    prompt = body.get("messages", body.get("input", ""))
+    completion = body.get("max_completion_tokens") or body.get("max_tokens")
+    if completion is None:
+        completion = completion_tokens if "messages" in body else 0
+    return max(len(json.dumps(prompt)) // 4 + completion, 1)
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class _ReleasingAsyncStream(httpx.AsyncByteStream):
+    # Holds the limiter slot until the (possibly streamed) body is consumed
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self.stream = stream
+        self.release = release
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self.stream.aclose()
+        finally:
+            self.release()
+
+
+class _ReleasingSyncStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]):
+        self.stream = stream
+        self.release = release
+
+    def __iter__(self):
+        yield from self.stream
+
+    def close(self) -> None:
+        try:
+            self.stream.close()
+        finally:
+            self.release()
+
+
+def _once(fn: Callable[[], None]) -> Callable[[], None]:
+    done = threading.Event()
+
+    def wrapper() -> None:
+        if not done.is_set():
+            done.set()
+            fn()
+
+    return wrapper
+
+
+class RateLimitedAsyncTransport(httpx.AsyncBaseTransport):
+    def __init__(self, limiter: RateLimiter, transport: httpx.AsyncBaseTransport):
+        self.limiter = limiter
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await self.limiter.aacquire(estimate_request_tokens(request))
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException:
+            self.limiter.release(None)
+            raise
+        release = _once(lambda: self.limiter.release(response.status_code, _retry_after(response)))
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingAsyncStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    def __init__(self, limiter: RateLimiter, transport: httpx.BaseTransport):
+        self.limiter = limiter
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.limiter.acquire(estimate_request_tokens(request))
+        try:
+            response = self.transport.handle_request(request)
+        except BaseException:
+            self.limiter.release(None)
+            raise
+        release = _once(lambda: self.limiter.release(response.status_code, _retry_after(response)))
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingSyncStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+def create_http_clients(
+    limiter: RateLimiter,
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    http2: bool = True,
+) -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """
+    One keep-alive (HTTP/2 where the server supports it) connection pool per
+    provider, shared by every client of that provider, with all requests going
+    through the provider's RateLimiter. Timeouts are set per request by the
+    OpenAI clients.
+    """
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=60,
+    )
+    sync_client = httpx.Client(
+        transport=RateLimitedTransport(limiter, httpx.HTTPTransport(http2=http2, limits=limits)),
+    )
+    async_client = httpx.AsyncClient(
+        transport=RateLimitedAsyncTransport(limiter, httpx.AsyncHTTPTransport(http2=http2, limits=limits)),
+    )
+    return sync_client, async_client
@@ -0,0 +1,44 @@
+# lazy_agent.py
+import threading
+import time
+from typing import Any, Callable
+
+from helpers.logger import get_logger
+
+logger = get_logger("lazy_agent")
+
+
+class LazyAgent:
+    """
+    Stands in for a compiled agent that is only built on first use, so
+    rarely used agents do not cost startup time. Exposes what the supervisor,
+    the fan-out tool and the fast-path router call on an agent: name,
+    invoke / ainvoke and stream / astream.
+    """
+
+    def __init__(self, name: str, build: Callable[[], Any]):
+        self.name = name
+        self._build = build
+        self._agent = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        if self._agent is None:
+            with self._lock:
+                if self._agent is None:
+                    started = time.perf_counter()
+                    self._agent = self._build()
+                    logger.info(f"Built {self.name} on first use in {time.perf_counter() - started:.2f}s")
+        return self._agent
+
+    def invoke(self, *args, **kwargs) -> Any:
+        return self.get().invoke(*args, **kwargs)
+
+    async def ainvoke(self, *args, **kwargs) -> Any:
+        return await self.get().ainvoke(*args, **kwargs)
+
+    def stream(self, *args, **kwargs):
+        return self.get().stream(*args, **kwargs)
+
+    def astream(self, *args, **kwargs):
+        return self.get().astream(*args, **kwargs)
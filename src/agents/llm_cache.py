@@ -0,0 +1,95 @@
+# llm_cache.py
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.outputs import ChatGeneration, Generation
+
+from helpers.logger import get_logger
+
+logger = get_logger("llm_cache")
+
+
+class TTLSQLiteCache(BaseCache):
+    """
+    LangChain LLM cache in a local SQLite file, with a TTL and an LRU bound on
+    the number of entries. LangChain keys lookups by the serialized prompt
+    messages and the "llm string" (model, temperature, bound tools, ...), so
+    only identical calls to an identically configured model hit. Only use it
+    with temperature 0, where identical calls give identical completions.
+
+    Any other BaseCache (e.g. a Postgres-backed one) can be passed to
+    LLMClientFactory instead.
+    """
+
+    def __init__(self, database_path: str = "llm_cache.sqlite3", ttl_seconds: int = 86400, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(database_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used)")
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] >= self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+
+        try:
+            generations = loads(row[0], allowed_objects="all")
+        except Exception as e:
+            logger.warning(f"Dropping unreadable LLM cache entry - {str(e)}")
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            return None
+
+        for generation in generations:
+            if isinstance(generation, ChatGeneration):
+                # Fresh id so LangGraph does not merge it with an earlier message;
+                # the flag makes cache hits visible in agent traces.
+                generation.message.id = None
+                generation.message.response_metadata["cache_hit"] = True
+        logger.info("LLM cache hit")
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        now = time.time()
+        value = dumps(list(return_val))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (self._key(prompt, llm_string), value, now, now),
+            )
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at <= ?", (now - self.ttl_seconds,))
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM llm_cache")
@@ -1,5 +1,7 @@
 # llm_client_factory.py
 from typing import Optional
+import httpx
+from langchain_core.caches import BaseCache
 from langchain_openai import ChatOpenAI
 
 
@@ -16,10 +18,24 @@ class LLMClientFactory:
             raise RuntimeError("Groq API key must be provided (env var GROQ_API_KEY or parameter).")
         self.base_url = base_url
 
-    def create_client(self, model: str, temperature: float = 0.0 ) -> ChatOpenAI:
+    def create_client(
+        self,
+        model: str,
+        temperature: float = 0.0,
+        timeout: Optional[float] = None,
+        max_retries: int = 2,
+        cache: Optional[BaseCache] = None,  # response cache; only sensible at temperature 0
+        http_client: Optional[httpx.Client] = None,  # shared, rate-limited transport
+        http_async_client: Optional[httpx.AsyncClient] = None,
+    ) -> ChatOpenAI:
         llm = ChatOpenAI(
+            cache=cache,
+            http_client=http_client,
+            http_async_client=http_async_client,
             model= model,
             api_key=self.api_key,
             base_url=self.base_url,
-            temperature=temperature)
+            temperature=temperature,
+            timeout=timeout,
+            max_retries=max_retries)
         return llm
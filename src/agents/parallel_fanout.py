@@ -0,0 +1,95 @@
+# parallel_fanout.py
+import asyncio
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from .request_context import remaining_budget
+from helpers.logger import get_logger
+
+if TYPE_CHECKING:
+    from langchain_core.tools import StructuredTool
+
+logger = get_logger("parallel_fanout")
+
+FANOUT_TOOL_NAME = "ask_agents_in_parallel"
+
+
+class ParallelFanOut:
+    """
+    Runs several sub-agents on the same question concurrently, each under its
+    own timeout, and returns their answers as one block for the supervisor to
+    merge in a single turn (instead of one handoff + supervisor turn per agent).
+    """
+
+    def __init__(
+        self,
+        agents: Dict[str, Any],
+        branch_timeout: float = 30.0,
+        name: str = FANOUT_TOOL_NAME,
+    ):
+        self.agents = agents
+        self.branch_timeout = branch_timeout
+        self.name = name
+
+    @staticmethod
+    def _payload(question: str) -> Dict[str, Any]:
+        return {"messages": [{"role": "user", "content": question}]}
+
+    @staticmethod
+    def _last_content(result: Any) -> str:
+        messages = result.get("messages", []) if isinstance(result, dict) else []
+        return getattr(messages[-1], "content", "") if messages else ""
+
+    def _select(self, agents: List[str]) -> List[str]:
+        selected = [name for name in dict.fromkeys(agents) if name in self.agents]
+        unknown = set(agents) - set(selected)
+        if unknown:
+            logger.warning(f"Ignoring unknown fan-out agents: {sorted(unknown)}")
+        return selected
+
+    def _merge(self, outputs: Dict[str, str]) -> str:
+        return "\n\n".join(f"[{name}]\n{output}" for name, output in outputs.items())
+
+    async def _branch(self, agent_name: str, question: str) -> str:
+        # Never outlive the request deadline
+        timeout = remaining_budget(self.branch_timeout)
+        try:
+            result = await asyncio.wait_for(self.agents[agent_name].ainvoke(self._payload(question)), timeout=timeout)
+            return self._last_content(result)
+        except asyncio.TimeoutError:
+            logger.warning(f"Fan-out branch {agent_name} timed out after {timeout:.1f}s")
+            return f"No answer: timed out after {timeout:.0f}s."
+        except Exception as e:
+            logger.error(f"Fan-out branch {agent_name} failed - {str(e)}")
+            return "No answer: the agent failed."
+
+    async def arun(self, question: str, agents: List[str]) -> str:
+        selected = self._select(agents)
+        logger.info(f"Fanning out to {selected} (timeout={self.branch_timeout}s per branch)")
+        outputs = await asyncio.gather(*(self._branch(name, question) for name in selected))
+        return self._merge(dict(zip(selected, outputs)))
+
+    def run(self, question: str, agents: List[str]) -> str:
+        # Sync invocation has no event loop to fan out on; run the branches in turn
+        logger.warning("Parallel fan-out needs async agent invocation; running branches sequentially")
+        outputs = {}
+        for name in self._select(agents):
+            try:
+                outputs[name] = self._last_content(self.agents[name].invoke(self._payload(question)))
+            except Exception as e:
+                logger.error(f"Fan-out branch {name} failed - {str(e)}")
+                outputs[name] = "No answer: the agent failed."
+        return self._merge(outputs)
+
+    def get_tool(self) -> "StructuredTool":
+        # The query controller imports this module for FANOUT_TOOL_NAME; keep langchain off that path
+        from langchain_core.tools import StructuredTool
+
+        return StructuredTool.from_function(
+            func=self.run,
+            coroutine=self.arun,
+            name=self.name,
+            description=(
+                "Ask several agents the same question at the same time and get all their answers "
+                f"in one result. `agents` is a list of agent names from: {', '.join(self.agents)}."
+            ),
+        )
@@ -1,8 +1,28 @@
 # rag_agent_factory.py
-from typing import Any, Tuple, List
+import asyncio
+import contextvars
+from typing import Any, Dict, Tuple, List
 from langchain.agents import create_agent
-from langchain.tools import tool
 from langchain_core.documents import Document
+from langchain_core.tools import StructuredTool
+from sqlalchemy import cast, text
+from sqlalchemy.dialects.postgresql import JSONB
+from .context_packer import ContextPacker
+from .mmr import maximal_marginal_relevance
+from .request_context import (
+    RetrievalScope,
+    prefetched_hits,
+    remaining_budget,
+    retrieval_options,
+    retrieval_scope,
+)
+from helpers.db_connection import read_engine, read_session
+from helpers.pool_metrics import for_consumer
+from helpers.logger import get_logger
+from models.postgres.VectorsModel import VectorModel
+from models.postgres.tables_schema.tables import vector_store_table
+
+logger = get_logger("rag_agent")
 
 class RagAgentFactory:
     def __init__(
@@ -12,39 +32,141 @@ class RagAgentFactory:
         system_prompt: str = None,
         name: str = "rag_agent",
         k: int = 3,  # number of documents to retrieve
+        context_packer: ContextPacker = None,
+        tool_timeout: float = None,  # seconds per retrieval, also the SQL statement timeout
     ):
         self.vector_store = vector_store
         self.llm_client = llm_client
         self.system_prompt = system_prompt or (
             "You are a document retrieval agent. Use the context from retrieved documents "
-            "to answer user questions accurately and shortly."
+            "to answer user questions accurately and shortly. Cite sources by their [n] tags."
         )
         self.name = name
         self.k = k
+        self.context_packer = context_packer or ContextPacker()
+        self.tool_timeout = tool_timeout
+        self.store_table = vector_store_table(vector_store.get_table_name())
+        # Retrieval reads (replica when configured), counted as "retrieval" in the pool metrics
+        self.db_engine = for_consumer(read_engine, "retrieval")
+
+    def _scope_filters(self, scope: RetrievalScope) -> List[Any]:
+        """
+        WHERE clauses for the request's project / document / metadata scope,
+        pushed down into the candidate query so ranking only sees chunks the
+        caller is allowed to retrieve.
+        """
+        table = self.store_table
+        filters = []
+        if scope.project_id:
+            filters.append(table.c.project_id == scope.project_id)
+        if scope.document_ids:
+            filters.append(table.c.document_id.in_(scope.document_ids))
+        if scope.metadata:
+            # Typed JSON containment (@>): true, 3 and nested objects match as JSON, not as text
+            filters.append(cast(table.c.langchain_metadata, JSONB).contains(scope.metadata))
+        return filters
+
+    @staticmethod
+    async def _in_context(context: contextvars.Context, coro: Any) -> Any:
+        # Tasks start from the loop's context; carry the caller's request context over
+        for var, value in context.items():
+            var.set(value)
+        return await coro
+
+    async def _search(self, query: str) -> List[Tuple[Document, float]]:
+        """
+        Native async retrieval on a session from the shared pool, so the
+        search awaits instead of blocking or hopping to another event loop.
+        With MMR on, a larger candidate pool is fetched together with its
+        embeddings and re-ranked down to k diverse chunks.
+        """
+        options = retrieval_options.get()
+        scope = retrieval_scope.get()
+        prefetched = prefetched_hits.get()
+        if prefetched is not None and not options.mmr:
+            hits = prefetched.take()
+            if hits is not None:
+                logger.info("Using prefetched retrieval results")
+                return hits
+
+        fetch_k = max(options.fetch_k, self.k) if options.mmr else self.k
+
+        query_vector = await self.vector_store.embeddings.aembed_query(query)
+        timeout = remaining_budget(self.tool_timeout)
+        async with read_session(bind=self.db_engine) as db:
+            if timeout is not None:
+                # Postgres aborts the scan itself, not just our wait on it
+                await db.execute(text(f"SET LOCAL statement_timeout = {max(int(timeout * 1000), 1)}"))
+            candidates = await VectorModel().similarity_candidates(
+                db, self.store_table, query_vector, fetch_k,
+                with_embeddings=options.mmr, filters=self._scope_filters(scope),
+            )
 
-    def _get_tool(self):
-        @tool(response_format="content_and_artifact", description="Retrieve relevant documents")
+        if options.mmr and candidates:
+            selected = maximal_marginal_relevance(
+                query_vector, [c.embedding for c in candidates], k=self.k, lambda_mult=options.lambda_mult
+            )
+            logger.info(f"MMR kept {len(selected)} of {len(candidates)} candidates (lambda={options.lambda_mult})")
+            candidates = [candidates[i] for i in selected]
+
+        return [
+            (Document(id=str(c.id), page_content=c.text, metadata=c.metadata), c.distance)
+            for c in candidates
+        ]
+
+    async def prefetch(
+        self, queries: List[str], query_vectors: List[List[float]], scope: RetrievalScope
+    ) -> Dict[int, List[Tuple[Document, float]]]:
+        """
+        Top-k chunks for a batch of questions in one query, keyed by the
+        question's position, for each question's run as prefetched_hits.
+        Questions missing from the result (the query failed) search as usual.
+        """
+        async with read_session(bind=self.db_engine) as db:
+            candidates = await VectorModel().similarity_candidates_batch(
+                db, self.store_table, query_vectors, self.k, filters=self._scope_filters(scope)
+            )
+        return {
+            i: [
+                (Document(id=str(c.id), page_content=c.text, metadata=c.metadata), c.distance)
+                for c in hits
+            ]
+            for i, hits in candidates.items()
+        }
+
+    def _get_tool(self, loop: asyncio.AbstractEventLoop):
         def retrieve_context(query: str) -> Tuple[str, List[Document]]:
             """
             Retrieve relevant documents from the vector store.
-            Returns serialized content + raw documents as artifact.
+            Returns packed, citation-tagged content + packed documents as artifact.
             """
-            retrieved_docs = self.vector_store.similarity_search(query, k=self.k)
+            # Sync tool calls run in worker threads; the pool belongs to the app's
+            # loop. Same search as the async path: scope, metadata filter, MMR
+            coro = self._in_context(contextvars.copy_context(), aretrieve_context(query))
+            return asyncio.run_coroutine_threadsafe(coro, loop).result()
 
-            serialized = "\n\n".join(
-                f"Source: {doc.metadata}\nContent: {doc.page_content}"
-                for doc in retrieved_docs
-            )
+        async def aretrieve_context(query: str) -> Tuple[str, List[Document]]:
+            timeout = remaining_budget(self.tool_timeout)
+            try:
+                hits = await asyncio.wait_for(self._search(query), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Retrieval timed out after {timeout:.1f}s")
+                return "Retrieval timed out; no documents available.", []
+            return self.context_packer.pack(hits)
 
-            return serialized, retrieved_docs
-
-        return retrieve_context
+        return StructuredTool.from_function(
+            func=retrieve_context,
+            coroutine=aretrieve_context,
+            name="retrieve_context",
+            description="Retrieve relevant documents",
+            response_format="content_and_artifact",
+        )
 
     def get_rag_agent(self) -> Any:
         """
         Build the RAG agent.
         """
-        tool_fn = self._get_tool()
+        tool_fn = self._get_tool(asyncio.get_running_loop())
         agent = create_agent(
             self.llm_client,
             tools=[tool_fn],
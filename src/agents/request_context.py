@@ -0,0 +1,71 @@
+# request_context.py
+import contextvars
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+# Agents and their tools are built once at startup; per-request knobs reach
+# them through context variables set by the query controller.
+
+
+@dataclass(frozen=True)
+class RetrievalOptions:
+    mmr: bool = False
+    lambda_mult: float = 0.5
+    fetch_k: int = 20
+
+
+retrieval_options = contextvars.ContextVar("retrieval_options", default=RetrievalOptions())
+
+
+@dataclass(frozen=True)
+class RetrievalScope:
+    project_id: Optional[UUID] = None
+    document_ids: Tuple[UUID, ...] = ()
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+retrieval_scope = contextvars.ContextVar("retrieval_scope", default=RetrievalScope())
+
+
+# time.monotonic() by which the current request must finish (None = no deadline)
+request_deadline = contextvars.ContextVar("request_deadline", default=None)
+
+
+def remaining_budget(cap: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds left for a step of the current request: the time to the request
+    deadline, capped at the step's own budget. None means unbounded.
+    """
+    deadline = request_deadline.get()
+    if deadline is None:
+        return cap
+    remaining = max(deadline - time.monotonic(), 0.0)
+    return remaining if cap is None else min(cap, remaining)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class PrefetchedHits:
+    """
+    Top-k chunks fetched for one batch /query question before its agent run.
+    The run's first retrieval takes them instead of searching, whatever
+    wording the agent searches with; later retrievals (the agent refining
+    its search) go to the database.
+    """
+
+    def __init__(self, hits: List[Any]):
+        self._hits: Optional[List[Any]] = hits
+        self._lock = threading.Lock()
+
+    def take(self) -> Optional[List[Any]]:
+        with self._lock:
+            hits, self._hits = self._hits, None
+        return hits
+
+
+prefetched_hits = contextvars.ContextVar("prefetched_hits", default=None)
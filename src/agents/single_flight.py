@@ -0,0 +1,55 @@
+# single_flight.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from helpers.logger import get_logger
+
+logger = get_logger("single_flight")
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key onto one execution.
+
+    The first caller starts the work as a separate task; every caller, the
+    first included, awaits it through asyncio.shield, so one caller going away
+    does not cancel the work for the others. An error (or cancellation) of the
+    work is raised to every waiter, and the work is cancelled once the last
+    waiter has gone. Finished keys are forgotten immediately: this is not a
+    cache, later calls start a new execution.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            # The task copies the leader's context (request deadline, retrieval scope)
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            logger.info(f"Joining in-flight execution ({flight.waiters} waiting)")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                logger.info("All waiters left; cancelling in-flight execution")
+                flight.task.cancel()
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+query_flights = SingleFlight()
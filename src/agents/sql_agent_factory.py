@@ -1,46 +1,107 @@
 # sql_agent_factory.py
-from typing import Any
+import asyncio
+from typing import Any, Dict, List
 from langchain.agents import create_agent
-from langchain_community.agent_toolkits import SQLDatabaseToolkit
-from langchain_community.utilities import SQLDatabase
+from langchain.agents.middleware import ModelRequest, dynamic_prompt
+from langchain_core.tools import StructuredTool
+from .sql_executor import ReadOnlySQLExecutor
+from .sql_schema import SchemaSnapshot
+from .tool_cache import ToolCacheMiddleware, ToolResultCache, normalize_sql, referenced_tables
 
 class SQLAgentFactory:
     def __init__(
         self,
-        db_uri: str,
+        executor: ReadOnlySQLExecutor,  # read-only, cost-guarded queries on the shared pool
         llm_client: Any,
         top_k: int = 5,
         name: str = "sql_agent",
+        allowed_columns: Dict[str, List[str]] = None,
+        sample_rows: int = 3,
+        schema_refresh_seconds: float = 600,
+        tool_cache: ToolResultCache = None,  # query results, dropped when their tables are written
     ):
-        self.db_uri = db_uri
+        self.executor = executor
         self.llm_client = llm_client
         self.top_k = top_k
         self.name = name
+        self.allowed_columns = allowed_columns or {}
+        self.sample_rows = sample_rows
+        self.schema_refresh_seconds = schema_refresh_seconds
+        self.tool_cache = tool_cache
 
-    def build_agent(self) -> Any:
-        # Connect to the database
-        db = SQLDatabase.from_uri(self.db_uri)
+    def _get_tools(self, schema: SchemaSnapshot, loop: asyncio.AbstractEventLoop) -> List[StructuredTool]:
+        def sql_db_schema(table_names: List[str]) -> str:
+            """Columns, types, foreign keys and a few sample rows of the given tables."""
+            return schema.describe(table_names)
 
-        # Create a SQL toolkit that wraps schema info
-        toolkit = SQLDatabaseToolkit(db=db, llm=self.llm_client)
+        def sql_db_query(query: str) -> str:
+            """
+            Run a read-only SQL query and return its rows. On error, the error
+            is returned; rewrite the query and try again.
+            """
+            error = schema.check_query(query)
+            if error:
+                return error
+            # Sync tool calls run in worker threads; the pool belongs to the app's loop
+            return asyncio.run_coroutine_threadsafe(self.executor.run(query), loop).result()
 
-        # Extract LangChain tools (these automatically include schema)
-        tools = toolkit.get_tools()
+        async def asql_db_query(query: str) -> str:
+            error = schema.check_query(query)
+            if error:
+                return error
+            return await self.executor.run(query)
+
+        return [
+            StructuredTool.from_function(func=sql_db_schema, name="sql_db_schema"),
+            StructuredTool.from_function(func=sql_db_query, coroutine=asql_db_query, name="sql_db_query"),
+        ]
+
+    async def build_agent(self) -> Any:
+        # Schema comes from the snapshot, read through the executor's engine,
+        # so there are no per-turn information_schema lookups and no
+        # connection pool of the agent's own
+        schema = SchemaSnapshot(
+            self.executor.engine,
+            self.allowed_columns,
+            sample_rows=self.sample_rows,
+            refresh_seconds=self.schema_refresh_seconds,
+        )
+        await schema.build()
+
+        tools = self._get_tools(schema, asyncio.get_running_loop())
 
         # Optional system prompt to guide the agent behavior
-        system_prompt = f"""
+        base_prompt = f"""
 You are a smart SQL agent.
 1. Only read data; never modify it.
 2. After querying the database, do NOT return raw SQL results or how you queried the database or any information about it or it's schema.
 3. Instead, summarize the results in plain, user-friendly language.
 4. Highlight the most relevant fields .
 5. Always limit results to top {self.top_k} rows unless the user asks otherwise.
+6. Only the tables and columns below exist for you; call sql_db_schema for sample rows and foreign keys.
+
+Tables:
 """
+
+        @dynamic_prompt
+        def schema_prompt(request: ModelRequest) -> str:
+            # Picks up a refreshed snapshot without rebuilding the agent
+            return base_prompt + schema.prompt
+
+        middleware = [schema_prompt]
+        if self.tool_cache is not None:
+            middleware.append(ToolCacheMiddleware(
+                self.tool_cache,
+                "sql_db_query",
+                key=lambda args: normalize_sql(args["query"]),
+                tables=lambda args: referenced_tables(args["query"], schema.tables),
+            ))
+
         # Create the agent
         agent = create_agent(
             model=self.llm_client,
             tools=tools,
-            system_prompt=system_prompt,
+            middleware=middleware,
             name=self.name
         )
         return agent
@@ -0,0 +1,99 @@
+# sql_executor.py
+import asyncio
+import json
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .request_context import remaining_budget
+from helpers.logger import get_logger
+
+logger = get_logger("sql_executor")
+
+
+class SQLCostExceeded(Exception):
+    pass
+
+
+class ReadOnlySQLExecutor:
+    """
+    Runs LLM-written SQL on the shared async pool, each query in a READ ONLY
+    transaction bounded by a statement timeout and, when role is set, as
+    that role, whose column grants are the allow-list. At most max_concurrency
+    queries hold a connection at once, so the agent cannot drain the pool.
+    Every query is EXPLAINed first and refused when the planner's total cost
+    or row estimate is above the limits; accepted queries are streamed and
+    only the first max_result_rows rows are fetched.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        statement_timeout_ms: int = 10000,
+        max_plan_cost: float = 100000,
+        max_plan_rows: int = 100000,
+        max_result_rows: int = 50,
+        max_concurrency: int = 5,
+        role: Optional[str] = None,
+    ):
+        self.engine = engine
+        self.role = role
+        self.statement_timeout_ms = statement_timeout_ms
+        self.max_plan_cost = max_plan_cost
+        self.max_plan_rows = max_plan_rows
+        self.max_result_rows = max_result_rows
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    @staticmethod
+    def _statement(query: str):
+        # Colons in LLM-written SQL are literals, not bind parameters
+        return text(query.strip().rstrip(";").replace(":", "\\:"))
+
+    def _check_plan(self, plan: dict) -> None:
+        root = plan["Plan"]
+        cost, rows = root.get("Total Cost", 0), root.get("Plan Rows", 0)
+        if cost > self.max_plan_cost or rows > self.max_plan_rows:
+            raise SQLCostExceeded(
+                f"estimated cost {cost:.0f} / {rows} rows is above the limit "
+                f"({self.max_plan_cost:.0f} / {self.max_plan_rows} rows)"
+            )
+
+    def _timeout_ms(self) -> int:
+        # Never outlive the request deadline
+        budget = remaining_budget(self.statement_timeout_ms / 1000)
+        return max(int(budget * 1000), 1)
+
+    async def run(self, query: str) -> str:
+        statement = self._statement(query)
+        try:
+            async with self._slots, self.engine.connect() as conn:
+                # Both last until the transaction ends, which it does (rolled
+                # back) when the connection goes back to the pool
+                await conn.execute(text("SET TRANSACTION READ ONLY"))
+                await conn.execute(text(f"SET LOCAL statement_timeout = {self._timeout_ms()}"))
+                if self.role:
+                    await conn.execute(text(f"SET LOCAL ROLE {conn.dialect.identifier_preparer.quote(self.role)}"))
+
+                explain = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {statement.text}"))
+                plan = explain.scalar()
+                self._check_plan((json.loads(plan) if isinstance(plan, str) else plan)[0])
+
+                result = await conn.stream(statement)
+                rows = await result.fetchmany(self.max_result_rows + 1)
+                await result.close()
+        except SQLCostExceeded as e:
+            logger.warning(f"Rejected SQL agent query: {e}")
+            return (
+                f"Error: query rejected, {e}. Add selective WHERE conditions, "
+                f"aggregate, or LIMIT the rows and try again."
+            )
+        except Exception as e:
+            logger.warning(f"SQL agent query failed - {str(e)}")
+            return f"Error: {str(e).splitlines()[0] if str(e) else type(e).__name__}"
+
+        truncated = len(rows) > self.max_result_rows
+        output = str([tuple(row) for row in rows[:self.max_result_rows]])
+        if truncated:
+            output += f"\n(only the first {self.max_result_rows} rows are shown)"
+        return output
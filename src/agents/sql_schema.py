@@ -0,0 +1,241 @@
+# sql_schema.py
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy import inspect, select, table, column, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from helpers.logger import get_logger
+
+logger = get_logger("sql_schema")
+
+# Functions that run SQL given as text, or read files and large objects,
+# would get around the table and column checks
+_DENIED_FUNCTION_PREFIXES = (
+    "query_to_", "table_to_", "cursor_to_", "schema_to_", "database_to_",
+    "dblink", "pg_read", "pg_ls_", "pg_stat_file", "lo_",
+)
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    version: Optional[str] = None
+    prompt: str = ""
+    table_info: Dict[str, str] = field(default_factory=dict)
+
+
+class SchemaSnapshot:
+    """
+    Compact, precomputed view of the tables the SQL agent may use.
+
+    Only the allow-listed tables and columns are reflected, rendered once as
+    one line per table for the system prompt, plus a per-table digest (types,
+    foreign keys, a few sample rows) for the schema tool. Readers never touch
+    the database: once refresh_seconds have passed, a background task on the
+    loop the snapshot was built on checks the alembic revision and rebuilds
+    the snapshot only if a migration ran since.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        allowed_columns: Dict[str, List[str]],
+        sample_rows: int = 3,
+        refresh_seconds: float = 600,
+        max_value_chars: int = 40,
+    ):
+        self.engine = engine
+        self.allowed_columns = {t: list(cols) for t, cols in allowed_columns.items()}
+        self.sample_rows = sample_rows
+        self.refresh_seconds = refresh_seconds
+        self.max_value_chars = max_value_chars
+        self._snapshot = _Snapshot()
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._denied_names: List[str] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    # ------------------------- Build -------------------------
+    def _migration_version(self, conn) -> Optional[str]:
+        try:
+            return conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+        except Exception:
+            conn.rollback()
+            return None
+
+    def _sample_digest(self, conn, table_name: str, columns: List[str]) -> str:
+        if not self.sample_rows:
+            return ""
+        stmt = select(*(column(c) for c in columns)).select_from(table(table_name)).limit(self.sample_rows)
+        rows = conn.execute(stmt).fetchall()
+        lines = [
+            " | ".join(str(value)[:self.max_value_chars] for value in row)
+            for row in rows
+        ]
+        return "\n".join([f"Sample rows ({' | '.join(columns)}):", *lines]) if lines else "Sample rows: (empty)"
+
+    async def build(self) -> None:
+        """Reflect the allow-listed tables and rebuild the snapshot."""
+        self._loop = asyncio.get_running_loop()
+        async with self.engine.connect() as conn:
+            await conn.run_sync(self._build)
+
+    def _build(self, conn) -> None:
+        # Runs inside AsyncConnection.run_sync: inspect() needs a sync connection
+        started = time.perf_counter()
+        version = self._migration_version(conn)
+        inspector = inspect(conn)
+        existing = set(inspector.get_table_names())
+
+        prompt_lines, table_info = [], {}
+        for table_name, allowed in self.allowed_columns.items():
+            if table_name not in existing:
+                logger.warning(f"Allow-listed table {table_name} does not exist; skipping")
+                continue
+            reflected = {c["name"]: c for c in inspector.get_columns(table_name)}
+            columns = [c for c in allowed if c in reflected]
+            if not columns:
+                continue
+            primary_key = set(inspector.get_pk_constraint(table_name).get("constrained_columns") or [])
+            foreign_keys = [
+                (fk["constrained_columns"], fk["referred_table"], fk["referred_columns"])
+                for fk in inspector.get_foreign_keys(table_name)
+                if set(fk["constrained_columns"]) <= set(columns) and fk["referred_table"] in self.allowed_columns
+            ]
+
+            typed = [
+                f"{c} {str(reflected[c]['type']).lower()}{' pk' if c in primary_key else ''}"
+                for c in columns
+            ]
+            prompt_lines.append(f"{table_name}({', '.join(typed)})")
+
+            details = [f"Table {table_name}: {', '.join(typed)}"]
+            for local, referred_table, referred in foreign_keys:
+                details.append(f"FK ({', '.join(local)}) -> {referred_table}({', '.join(referred)})")
+            digest = self._sample_digest(conn, table_name, columns)
+            if digest:
+                details.append(digest)
+            table_info[table_name] = "\n".join(details)
+
+        denied = set(existing) - set(table_info)
+        visible_columns = {c for t in table_info for c in self.allowed_columns[t]}
+        for table_name in table_info:
+            denied |= {c["name"] for c in inspector.get_columns(table_name)} - visible_columns
+
+        with self._lock:
+            self._snapshot = _Snapshot(version=version, prompt="\n".join(prompt_lines), table_info=table_info)
+            self._denied_names = sorted(denied)
+            self._checked_at = time.monotonic()
+        logger.info(
+            f"Schema snapshot built for {len(table_info)} tables "
+            f"(revision {version}) in {time.perf_counter() - started:.2f}s"
+        )
+
+    async def _refresh_if_migrated(self) -> None:
+        try:
+            async with self.engine.connect() as conn:
+                version = await conn.run_sync(self._migration_version)
+            if version != self._snapshot.version:
+                logger.info(f"Schema revision changed ({self._snapshot.version} -> {version}); rebuilding snapshot")
+                await self.build()
+            else:
+                with self._lock:
+                    self._checked_at = time.monotonic()
+        except Exception as e:
+            logger.warning(f"Schema snapshot refresh failed; keeping the current one - {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _current(self) -> _Snapshot:
+        # Serve the cached snapshot; revalidate in the background when due
+        with self._lock:
+            due = time.monotonic() - self._checked_at >= self.refresh_seconds
+            if due and not self._refreshing and self._loop is not None:
+                self._refreshing = True
+                # Thread-safe scheduling: readers run on the loop and in tool worker threads
+                asyncio.run_coroutine_threadsafe(self._refresh_if_migrated(), self._loop)
+            return self._snapshot
+
+    # ------------------------- Read -------------------------
+    @property
+    def prompt(self) -> str:
+        return self._current().prompt
+
+    @property
+    def tables(self) -> List[str]:
+        return list(self._current().table_info)
+
+    def describe(self, table_names: List[str]) -> str:
+        info = self._current().table_info
+        known = [t for t in table_names if t in info]
+        unknown = [t for t in table_names if t not in info]
+        parts = [info[t] for t in known]
+        if unknown:
+            parts.append(f"Unknown tables: {', '.join(unknown)}. Available tables: {', '.join(info)}")
+        return "\n\n".join(parts)
+
+    def check_query(self, query: str) -> Optional[str]:
+        """
+        Return an error message if the query could read anything outside the
+        allow-list. The query is parsed (sqlglot, Postgres dialect), so every
+        table, column, star and whole-row reference is checked, not just the
+        names that appear in it. The sql_agent_reader role's column grants
+        enforce the same allow-list in the database.
+        """
+        import sqlglot  # only SQL agent tool calls need the parser
+        from sqlglot import exp
+
+        try:
+            statements = [s for s in sqlglot.parse(query, read="postgres") if s is not None]
+        except sqlglot.errors.SqlglotError as e:
+            return f"Error: could not parse the query - {str(e).splitlines()[0]}"
+        if len(statements) != 1:
+            return "Error: send exactly one SELECT statement."
+        tree = statements[0]
+        if not isinstance(tree, exp.Query):
+            return "Error: only SELECT queries are allowed."
+
+        with self._lock:
+            denied = {name.lower() for name in self._denied_names}
+        allowed = {t.lower(): {c.lower() for c in cols} for t, cols in self.allowed_columns.items()}
+        visible = set().union(*allowed.values())
+        ctes = {cte.alias_or_name.lower() for cte in tree.find_all(exp.CTE)}
+
+        # Tables (and CTEs / subqueries) in the query, under their names and aliases
+        sources = set()
+        for source in tree.find_all(exp.Table):
+            name = source.name.lower()
+            if name not in allowed and name not in ctes:
+                return f"Error: the query uses tables that are not available: {source.name}."
+            sources |= {name, source.alias_or_name.lower()}
+        sources |= {sq.alias.lower() for sq in tree.find_all(exp.Subquery) if sq.alias}
+
+        # SELECT * and t.* would also return hidden columns; count(*) is fine
+        if any(not isinstance(star.parent, exp.Count) for star in tree.find_all(exp.Star)):
+            return "Error: name the columns to select instead of using *."
+
+        for function in tree.find_all(exp.Func):
+            name = (function.name if isinstance(function, exp.Anonymous) else function.sql_name()).lower()
+            if name.startswith(_DENIED_FUNCTION_PREFIXES):
+                return f"Error: the function {name} is not available."
+
+        hits = sorted({i.name for i in tree.find_all(exp.Identifier) if i.name.lower() in denied})
+        if hits:
+            return f"Error: the query uses tables or columns that are not available: {', '.join(hits)}."
+
+        defined = {a.alias.lower() for a in tree.find_all(exp.Alias)}
+        for table_alias in tree.find_all(exp.TableAlias):
+            defined |= {c.name.lower() for c in table_alias.columns}
+        for col in tree.find_all(exp.Column):
+            name = col.name.lower()
+            # A bare table name or alias is the whole row: row_to_json(u), SELECT u FROM users u
+            if not col.table and name in sources and name not in visible:
+                return f"Error: select named columns, not whole rows ({col.name})."
+            if name not in visible and name not in defined:
+                return f"Error: the query uses columns that are not available: {col.name}."
+        return None
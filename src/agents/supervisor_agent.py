@@ -1,7 +1,6 @@
 # supervisor_agent.py
 
 from typing import Any, List
-from langgraph_supervisor import create_supervisor
 
 class SupervisorAgentFactory:
     def __init__(
@@ -10,18 +9,24 @@ class SupervisorAgentFactory:
         model: Any,
         system_prompt: str,
         output_mode: str = "last_message",
-        name: str = "supervisor"
+        name: str = "supervisor",
+        tools: List[Any] = None
     ):
         self.agents = agents
         self.model = model
         self.system_prompt = system_prompt
         self.output_mode = output_mode
         self.name = name
+        self.tools = tools or []
 
     def build(self) -> Any:
+        # Loaded on first build, not when the module is imported
+        from langgraph_supervisor import create_supervisor
+
         supervisor = create_supervisor(
             agents=self.agents,
             model=self.model,
+            tools=self.tools,
             prompt=self.system_prompt,
             output_mode=self.output_mode,
             supervisor_name=self.name
@@ -0,0 +1,174 @@
+# tool_cache.py
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import ToolMessage
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from helpers.logger import get_logger
+
+logger = get_logger("tool_cache")
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+_WRITE_TARGET = re.compile(
+    r"\b(?:insert\s+into|update|delete\s+from|truncate(?:\s+table)?)\s+(?:only\s+)?"
+    r"((?:\"?\w+\"?\.)?\"?\w+\"?)",
+    re.IGNORECASE,
+)
+
+
+def normalize_sql(query: str) -> str:
+    return " ".join(query.split()).rstrip(";").strip()
+
+
+def written_tables(statement: str) -> FrozenSet[str]:
+    """Tables an INSERT / UPDATE / DELETE / TRUNCATE statement writes to (schema and quotes stripped)."""
+    return frozenset(m.group(1).split(".")[-1].strip('"').lower() for m in _WRITE_TARGET.finditer(statement))
+
+
+def referenced_tables(query: str, known_tables: Iterable[str]) -> FrozenSet[str]:
+    used = {name.lower() for name in _IDENTIFIER.findall(query)}
+    return frozenset(t.lower() for t in known_tables if t.lower() in used)
+
+
+class ToolResultCache:
+    """
+    TTL + LRU cache of tool results (content, artifact). Entries can be tagged
+    with the tables they were read from and dropped when those tables are
+    written. Thread-safe: sync tool calls run in worker threads.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float = 60, max_entries: int = 1000):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Any, float, FrozenSet[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, created_at, _ = entry
+            if time.monotonic() - created_at >= self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, tables: FrozenSet[str] = frozenset()) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic(), tables)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_tables(self, tables: Iterable[str]) -> None:
+        tables = set(tables)
+        with self._lock:
+            stale = [key for key, (_, _, used) in self._entries.items() if used & tables]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            logger.info(f"{self.name} tool cache: dropped {len(stale)} entries after writes to {sorted(tables)}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def invalidate_on_commit(engine: Engine, caches: List[ToolResultCache]) -> None:
+    """
+    Drop cached results that read a table once a transaction writing it
+    commits on this engine (pass engine.sync_engine for an AsyncEngine).
+    Writes made elsewhere (other processes, migrations) only expire by TTL.
+    """
+    @event.listens_for(engine, "after_cursor_execute")
+    def _track_writes(conn, cursor, statement, parameters, context, executemany):
+        tables = written_tables(statement)
+        if tables:
+            conn.info.setdefault("written_tables", set()).update(tables)
+
+    @event.listens_for(engine, "commit")
+    def _invalidate(conn):
+        tables = conn.info.pop("written_tables", None)
+        if tables:
+            for cache in caches:
+                cache.invalidate_tables(tables)
+
+    @event.listens_for(engine, "rollback")
+    def _forget(conn):
+        conn.info.pop("written_tables", None)
+
+
+class ToolCacheMiddleware(AgentMiddleware):
+    """
+    Answers repeated calls of one tool from a ToolResultCache. Hits are
+    returned as ToolMessages with response_metadata["cache_hit"] = True, so
+    they show up in agent traces; errors are never cached.
+    """
+
+    def __init__(
+        self,
+        cache: ToolResultCache,
+        tool_name: str,
+        key: Callable[[Dict[str, Any]], str],
+        tables: Callable[[Dict[str, Any]], FrozenSet[str]] = None,
+    ):
+        super().__init__()
+        self.cache = cache
+        self.tool_name = tool_name
+        self.key = key
+        self.tables = tables
+
+    @property
+    def name(self) -> str:
+        return f"ToolCacheMiddleware[{self.tool_name}]"
+
+    def _lookup(self, request) -> Tuple[Optional[str], Optional[ToolMessage]]:
+        call = request.tool_call
+        if call["name"] != self.tool_name:
+            return None, None
+        key = self.key(call["args"])
+        cached = self.cache.get(key)
+        if cached is None:
+            return key, None
+        content, artifact = cached
+        logger.info(f"{self.cache.name} tool cache hit")
+        return key, ToolMessage(
+            content=content,
+            artifact=artifact,
+            name=self.tool_name,
+            tool_call_id=call["id"],
+            response_metadata={"cache_hit": True},
+        )
+
+    def _store(self, key: Optional[str], request, result: Any) -> None:
+        if key is None or not isinstance(result, ToolMessage) or result.status == "error":
+            return
+        if isinstance(result.content, str) and result.content.startswith("Error"):
+            return
+        tables = self.tables(request.tool_call["args"]) if self.tables else frozenset()
+        self.cache.set(key, (result.content, result.artifact), tables)
+
+    def wrap_tool_call(self, request, handler):
+        key, hit = self._lookup(request)
+        if hit is not None:
+            return hit
+        result = handler(request)
+        self._store(key, request, result)
+        return result
+
+    async def awrap_tool_call(self, request, handler):
+        key, hit = self._lookup(request)
+        if hit is not None:
+            return hit
+        result = await handler(request)
+        self._store(key, request, result)
+        return result
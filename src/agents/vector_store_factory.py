@@ -1,60 +1,100 @@
 # vector_store_factory.py
 
-from typing import Any
-from langchain_postgres import PGEngine, PGVectorStore
+from typing import Any, List, Tuple
+from langchain_postgres import Column, PGEngine, PGVectorStore
 from langchain_core.embeddings import Embeddings  # or your embedding service interface
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from helpers.logger import get_logger
 import asyncio
 
+logger = get_logger("vector_store_factory")
+
+# Metadata keys stored as real (indexed) columns instead of inside the JSON
+# metadata, so retrieval filters on them are pushed down as WHERE clauses.
+METADATA_COLUMNS: List[Column] = [
+    Column("project_id", "UUID"),
+    Column("document_id", "UUID"),
+]
+
 class VectorStoreFactory:
     def __init__(
         self,
-        connection_string: str,
+        engine: AsyncEngine,  # the app's shared engine; the store opens no pool of its own
         table_name: str,
         embedding_service: Embeddings,
         schema_name: str = "public",
         vector_size: int = None,   # you’ll need to pass vector dimension if initializing fresh
     ):
-        self.connection_string = connection_string
+        self.engine = engine
         self.table_name = table_name
         self.embedding_service = embedding_service
         self.schema_name = schema_name
         self.vector_size = vector_size
 
+    def _schema_state(self, conn) -> Tuple[bool, bool]:
+        # (table exists, project_id index exists)
+        inspector = inspect(conn)
+        if not inspector.has_table(self.table_name, schema=self.schema_name):
+            return False, False
+        indexes = inspector.get_indexes(self.table_name, schema=self.schema_name)
+        return True, any(index["name"] == f"idx_{self.table_name}_project_id" for index in indexes)
+
     async def create_vector_store(self) -> PGVectorStore:
-        # 1. Create the PGEngine (async engine)
-        pg_engine = PGEngine.from_connection_string(url=self.connection_string)
+        # 1. Wrap the shared async engine. Its connections belong to the app's
+        # loop, so the store's sync methods run their coroutines there: call
+        # them from worker threads only, and use the a* methods on the loop
+        pg_engine = PGEngine.from_engine(self.engine, loop=asyncio.get_running_loop())
+
+        # DDL only when the schema is not current yet: CREATE TABLE fails on an
+        # existing table, and DDL takes locks that stall a rolling restart
+        async with self.engine.connect() as conn:
+            table_exists, index_exists = await conn.run_sync(self._schema_state)
 
         # 2. Initialize the table if needed (creates id_column 'langchain_id' etc.)
-        if self.vector_size is None:
-            raise ValueError("vector_size must be provided when initializing a new vector store table.")
-        await pg_engine.ainit_vectorstore_table(
-            table_name=self.table_name,
-            vector_size=self.vector_size,
-            schema_name=self.schema_name
-        )
+        if not table_exists:
+            if self.vector_size is None:
+                raise ValueError("vector_size must be provided when initializing a new vector store table.")
+            logger.info(f"Creating vector store table {self.schema_name}.{self.table_name}")
+            await pg_engine.ainit_vectorstore_table(
+                table_name=self.table_name,
+                vector_size=self.vector_size,
+                schema_name=self.schema_name,
+                metadata_columns=METADATA_COLUMNS
+            )
+
+        # 3. Btree index backing the project_id pushdown
+        if not index_exists:
+            async with self.engine.begin() as conn:
+                await conn.execute(text(
+                    f'CREATE INDEX IF NOT EXISTS "idx_{self.table_name}_project_id" '
+                    f'ON "{self.schema_name}"."{self.table_name}" (project_id)'
+                ))
 
-        # 3. Create the vector store object
+        # 4. Create the vector store object
         vector_store = await PGVectorStore.create(
             engine=pg_engine,
             table_name=self.table_name,
             embedding_service=self.embedding_service,
-            schema_name=self.schema_name
+            schema_name=self.schema_name,
+            metadata_columns=[column.name for column in METADATA_COLUMNS]
             # You can also pass id_column, content_column etc if you customized them
         )
 
         return vector_store
 
-    def create_vector_store_sync(self) -> PGVectorStore:
+    def create_vector_store_sync(self, loop: asyncio.AbstractEventLoop) -> PGVectorStore:
         """
-        If you really need a synchronous version, you can use create_sync,
-        but your engine needs to support sync mode, and table must already exist.
+        If you really need a synchronous version, you can use create_sync.
+        loop is the running loop the shared engine belongs to; call this from
+        another thread, and the table must already exist.
         """
-        # Create sync engine from string (v2 supports asyncpg or sync)
-        engine = PGEngine.from_connection_string(url=self.connection_string)
+        engine = PGEngine.from_engine(self.engine, loop=loop)
         vector_store = PGVectorStore.create_sync(
             engine=engine,
             table_name=self.table_name,
             embedding_service=self.embedding_service,
-            schema_name=self.schema_name
+            schema_name=self.schema_name,
+            metadata_columns=[column.name for column in METADATA_COLUMNS]
         )
         return vector_store
@@ -1,10 +1,13 @@
 from langchain.agents import create_agent
 from langchain.tools import tool
 from typing import Any, Tuple
+from .request_context import normalize_query
+from .tool_cache import ToolCacheMiddleware, ToolResultCache
 
 class WebSearchAgentFactory:
-    def __init__(self, llm_client: Any, system_prompt: str = None, name: str = "web_agent"):
+    def __init__(self, llm_client: Any, system_prompt: str = None, name: str = "web_agent", tool_cache: ToolResultCache = None):
         self.llm_client = llm_client
+        self.tool_cache = tool_cache
         self.system_prompt = system_prompt or (
             "You have access to a web search tool that retrieves up‑to‑date "
             "information from the internet. Use it to answer queries that need current data."
@@ -31,6 +34,9 @@ class WebSearchAgentFactory:
             self.llm_client,
             tools=[tool_fn],
             system_prompt=self.system_prompt,
+            middleware=[ToolCacheMiddleware(
+                self.tool_cache, "web_search", key=lambda args: normalize_query(args["query"])
+            )] if self.tool_cache is not None else [],
             name=self.name
         )
         return agent
@@ -0,0 +1,56 @@
+"""vector store scope columns
+
+Revision ID: 8b1f4c2d9e73
+Revises: 62c464ed8d46
+Create Date: 2026-10-19 10:12:41.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from helpers import settings
+
+# revision identifiers, used by Alembic.
+revision: str = '8b1f4c2d9e73'
+down_revision: Union[str, Sequence[str], None] = '62c464ed8d46'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The PGVectorStore table is created by langchain-postgres at startup, not by
+# these migrations; this only upgrades tables created before the project_id /
+# document_id metadata columns existed.
+TABLE = settings.VECTOR_TABLE
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table(TABLE):
+        return
+
+    op.execute(f'ALTER TABLE "{TABLE}" ADD COLUMN IF NOT EXISTS project_id UUID')
+    op.execute(f'ALTER TABLE "{TABLE}" ADD COLUMN IF NOT EXISTS document_id UUID')
+
+    # Backfill from the loader's source path: assets/<project>/<filename>
+    op.execute(f"""
+        UPDATE "{TABLE}" AS v
+        SET project_id = d.project_id, document_id = d.id
+        FROM documents AS d
+        JOIN projects AS p ON p.id = d.project_id
+        WHERE v.project_id IS NULL
+          AND p.name = split_part(v.langchain_metadata->>'source', '/', 2)
+          AND d.filename = split_part(v.langchain_metadata->>'source', '/', 3)
+    """)
+
+    op.execute(f'CREATE INDEX IF NOT EXISTS "idx_{TABLE}_project_id" ON "{TABLE}" (project_id)')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table(TABLE):
+        return
+
+    op.execute(f'DROP INDEX IF EXISTS "idx_{TABLE}_project_id"')
+    op.execute(f'ALTER TABLE "{TABLE}" DROP COLUMN IF EXISTS document_id')
+    op.execute(f'ALTER TABLE "{TABLE}" DROP COLUMN IF EXISTS project_id')
@@ -0,0 +1,54 @@
+"""sql agent reader role
+
+Revision ID: a7c3e5f9b214
+Revises: f2b8d4e6a913
+Create Date: 2026-10-19 18:05:12.440391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c3e5f9b214'
+down_revision: Union[str, Sequence[str], None] = 'f2b8d4e6a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLE = 'sql_agent_reader'
+
+# Mirrors the default SQL_AGENT_ALLOWED_COLUMNS; widen both together
+ALLOWED_COLUMNS = {
+    'users': ['id', 'username', 'role', 'created_at'],
+    'projects': ['id', 'name', 'description', 'created_at'],
+    'project_users': ['id', 'project_id', 'user_id'],
+    'documents': ['id', 'project_id', 'filename', 'is_processed', 'is_flushed', 'created_at'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The SQL agent switches to this role (SET LOCAL ROLE) for every query, so
+    # only the granted columns are readable whatever SQL the model writes
+    op.execute(f"""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT FROM pg_roles WHERE rolname = '{ROLE}') THEN
+                CREATE ROLE {ROLE} NOLOGIN;
+            END IF;
+        END
+        $$
+    """)
+    op.execute(f"GRANT {ROLE} TO CURRENT_USER")
+    op.execute(f"GRANT USAGE ON SCHEMA public TO {ROLE}")
+    for table, columns in ALLOWED_COLUMNS.items():
+        op.execute(f"GRANT SELECT ({', '.join(columns)}) ON {table} TO {ROLE}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, columns in ALLOWED_COLUMNS.items():
+        op.execute(f"REVOKE SELECT ({', '.join(columns)}) ON {table} FROM {ROLE}")
+    op.execute(f"REVOKE USAGE ON SCHEMA public FROM {ROLE}")
+    op.execute(f"DROP ROLE IF EXISTS {ROLE}")
@@ -0,0 +1,28 @@
+"""pg_prewarm extension
+
+Revision ID: e4a6b2c8d0f1
+Revises: c3d7a9e1f254
+Create Date: 2026-10-19 14:21:40.118273
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a6b2c8d0f1'
+down_revision: Union[str, Sequence[str], None] = 'c3d7a9e1f254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Used by the readiness probe to load hot relations into shared buffers
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_prewarm")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP EXTENSION IF EXISTS pg_prewarm")
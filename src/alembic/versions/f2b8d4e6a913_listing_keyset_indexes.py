@@ -0,0 +1,39 @@
+"""listing keyset indexes
+
+Revision ID: f2b8d4e6a913
+Revises: e4a6b2c8d0f1
+Create Date: 2026-10-19 16:47:03.552918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d4e6a913'
+down_revision: Union[str, Sequence[str], None] = 'e4a6b2c8d0f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('idx_projects_created', 'projects', ['created_at', 'id']),
+    ('idx_documents_project_created', 'documents', ['project_id', 'created_at', 'id']),
+    ('idx_documents_project_processed_created', 'documents', ['project_id', 'is_processed', 'created_at', 'id']),
+    ('idx_documents_project_flushed_created', 'documents', ['project_id', 'is_flushed', 'created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY so large documents tables stay writable; it cannot run in a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,102 @@
+# import_profile.py
+"""
+Import-time profile of the app, from `python -X importtime`.
+
+Run from src/ (settings are read from .env):
+
+    python benchmarks/import_profile.py --output benchmarks/import_profile.txt
+
+For each profiled module it prints the median wall time of a fresh
+interpreter importing it (what every uvicorn worker and CLI invocation pays
+before doing any work), the import time summed per top-level package, and
+the slowest first-party modules. Exits non-zero when `import main` is over
+--budget-ms.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIRST_PARTY = ("main", "agents", "controllers", "helpers", "middlewares", "models", "routes")
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def profile_once(module: str) -> Tuple[float, List[Tuple[int, int, int, str]]]:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    return wall_ms, rows
+
+
+def digest(module: str, runs: int, top: int) -> Tuple[float, str]:
+    samples = [profile_once(module) for _ in range(runs)]
+    wall_ms = statistics.median(wall for wall, _ in samples)
+    # Per-module figures from the run closest to the median
+    _, rows = min(samples, key=lambda sample: abs(sample[0] - wall_ms))
+
+    per_package: Dict[str, int] = defaultdict(int)
+    for self_us, _, _, name in rows:
+        per_package[name.split(".")[0]] += self_us
+    first_party = [row for row in rows if row[3].split(".")[0] in FIRST_PARTY]
+
+    lines = [
+        f"== import {module} ==",
+        f"wall time (fresh interpreter, median of {runs}): {wall_ms:.0f} ms",
+        f"import time: {sum(row[0] for row in rows) / 1000:.0f} ms in {len(rows)} modules",
+        "",
+        f"top {top} packages (self time summed):",
+    ]
+    for package, self_us in sorted(per_package.items(), key=lambda item: -item[1])[:top]:
+        lines.append(f"  {self_us / 1000:8.1f} ms  {package}")
+    lines += ["", f"top {top} first-party modules (cumulative):"]
+    for _, cumulative_us, _, name in sorted(first_party, key=lambda row: -row[1])[:top]:
+        lines.append(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+    return wall_ms, "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", action="append", help="module to profile (repeatable)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=700, help="wall-time budget for `import main`")
+    parser.add_argument("--output", help="also write the digest to this file")
+    args = parser.parse_args()
+
+    modules = args.module or ["main", "agents.agentic_rag_service"]
+    sections, over_budget = [], False
+    for module in modules:
+        wall_ms, text = digest(module, args.runs, args.top)
+        if module == "main":
+            over_budget = wall_ms > args.budget_ms
+            text += f"\n\nbudget: {args.budget_ms:.0f} ms -> {'OVER' if over_budget else 'ok'}"
+        sections.append(text)
+
+    report = f"python {sys.version.split()[0]}\n\n" + "\n\n".join(sections) + "\n"
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
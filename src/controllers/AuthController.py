@@ -6,6 +6,7 @@ from models.postgres.ProjectsModel import ProjectModel
 from models.postgres.operations_schema.projects import ProjectSearch
 from models.postgres.tables_schema.tables import ProjectUser
 from routes.exceptions import UserAlreadyExists, UserNotFound, InvalidCredentials, NotPermitted, TokenError
+from helpers.db_connection import unit_of_work
 from helpers.logger import get_logger
 
 logger = get_logger("auth_controller")
@@ -22,7 +23,8 @@ class AuthController:
             logger.warning(f"Signup failed: username exists: {user.username}")
             raise UserAlreadyExists()
         
-        _ = await auth_model.create_user(db, user.username, user.password)
+        async with unit_of_work(db):
+            _ = await auth_model.create_user(db, user.username, user.password)
         logger.info(f"User created successfully: {user.username}")
         return {"data": None, "message": "User created successfully"}
 
@@ -33,11 +35,12 @@ class AuthController:
             logger.warning(f"Invalid login for username={user.username}")
             raise InvalidCredentials()
 
-        await auth_model.remove_token(db, db_user.id)
-
         access_token = create_access_token({"sub": str(db_user.id)})
         refresh_token = create_refresh_token(db_user.id)
-        await auth_model.store_refresh_token(db, db_user.id, refresh_token)
+        # Replace the old tokens atomically
+        async with unit_of_work(db):
+            await auth_model.remove_token(db, db_user.id)
+            await auth_model.store_refresh_token(db, db_user.id, refresh_token)
 
         logger.info(f"User logged in successfully: {user.username}")
         return {
@@ -63,7 +66,8 @@ class AuthController:
 
     async def logout(self, db, current_user):
         logger.info(f"Logout attempt user_id={current_user['id']}")
-        await auth_model.remove_token(db, current_user["id"])
+        async with unit_of_work(db):
+            await auth_model.remove_token(db, current_user["id"])
         logger.info(f"User {current_user['id']} logged out successfully")
         return {"data": None, "message": "Logged out successfully"}
 
@@ -89,7 +93,8 @@ class AuthController:
             logger.warning(f"User {data.username} already authorized for project {data.project_name}")
             raise TokenError("User already authorized for this project")
 
-        await auth_model.create_project_user(db, project.id, target_user.id)
+        async with unit_of_work(db):
+            await auth_model.create_project_user(db, project.id, target_user.id)
         logger.info(f"User {data.username} authorized for project {data.project_name}")
         return {"data": None, "message": "Project authorized successfully"}
 
@@ -99,13 +104,14 @@ class AuthController:
             logger.warning("Unauthorized deauthorize attempt")
             raise NotPermitted()
 
-        project = await project_model.search_by_name(ProjectSearch(name=data.project_name))
+        project = await project_model.search_by_name(db, ProjectSearch(name=data.project_name))
         target_user = await auth_model.get_user_by_username(db, data.username)
         if not target_user:
             logger.warning(f"Target user not found: {data.username}")
             raise UserNotFound()
 
-        await auth_model.deauthorize_user(db, target_user.id, project.id)
+        async with unit_of_work(db):
+            await auth_model.deauthorize_user(db, target_user.id, project.id)
         logger.info(f"User {data.username} deauthorized from project {data.project_name}")
         return {"data": None, "message": f"User {data.username} deauthorized from project {data.project_name}"}
 
@@ -120,6 +126,7 @@ class AuthController:
             logger.warning(f"Target user not found: {data.username}")
             raise UserNotFound()
 
-        await auth_model.update_user_role(db, target_user.id, data.new_role)
+        async with unit_of_work(db):
+            await auth_model.update_user_role(db, target_user.id, data.new_role)
         logger.info(f"User {data.username} role updated to {data.new_role}")
         return {"data": None, "message": f"User {data.username} role updated to {data.new_role}"}
@@ -1,16 +1,14 @@
 import hashlib
-import magic
 import re
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
 from fastapi import UploadFile
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .BaseController import BaseController
+from agents.answer_cache import answer_cache
 from models.postgres.operations_schema.projects import ProjectSearch
 from models.postgres.DocumentsModel import DocumentsModel
 from models.postgres.VectorsModel import VectorModel
@@ -19,8 +17,9 @@ from models.postgres.ChunksModel import ChunksModel
 from models.postgres.operations_schema import VectorInsertItems
 from models.postgres.operations_schema.documents import DocumentInsert, DocumentInsertBulk, DocumentSearch, DocumentDelete
 from models.postgres.operations_schema.chunks import ChunkInsert
+from models.postgres.tables_schema.tables import vector_store_table
 from routes.schemes.documents import DocumentDelRequest
-from helpers import settings
+from helpers import settings, unit_of_work
 from helpers.logger import get_logger
 
 logger = get_logger("DocumentsController")
@@ -35,6 +34,8 @@ class DocumentsController(BaseController):
 
     # ------------------------- Helpers -------------------------
     def validate_content_type(self, file: UploadFile) -> str:
+        import magic  # loads libmagic; deferred to the first upload
+
         mime = magic.Magic(mime=True)
         content_type = mime.from_buffer(file.file.read(1024))
         file.file.seek(0)
@@ -63,12 +64,17 @@ class DocumentsController(BaseController):
         if not pdf_path.exists():
             raise FileNotFoundError(f"File not found: {file_name} in project {project_name}")
 
+        # Heavy (pypdf, langchain_community); only document processing needs them
+        from langchain_community.document_loaders import PyPDFLoader
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
         loader = PyPDFLoader(str(pdf_path))
         docs = loader.load()
 
         splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap)
+            chunk_overlap=chunk_overlap,
+            add_start_index=True)
         all_splits = splitter.split_documents(docs)
 
         return all_splits
@@ -111,7 +117,8 @@ class DocumentsController(BaseController):
             for i, name in enumerate(names)
         ]
         bulk_docs = DocumentInsertBulk(project_id=project.id, documents=docs)
-        inserted_docs = await DocumentsModel().insert_documents_bulk(db, bulk_docs)
+        async with unit_of_work(db):
+            inserted_docs = await DocumentsModel().insert_documents_bulk(db, bulk_docs)
 
         msg = f"Uploaded {len(inserted_docs)} file(s) successfully"
         if duplicates:
@@ -127,30 +134,60 @@ class DocumentsController(BaseController):
         if not project:
             raise ValueError(f"Project '{project_name}' does not exist")
 
-        updated_docs = []
-
+        processed_docs = []
         for file_name in file_names:
             doc = await self.get_by_project_id_and_filename(db, project.id, file_name)
-            if not doc:
+            if not doc["data"]:
                 raise ValueError(f"File '{file_name}' not found")
             if doc["data"].is_flushed:
                 raise ValueError(f"File '{file_name}' is flushed. Re-upload to process.")
-            if doc["data"].is_processed:
-                await ChunksModel().delete_chunks_by_document_id(db, doc["data"].id)
-
-            all_splits = self.load_and_chunk_pdf(project_name, file_name, chunk_size, chunk_overlap)
-            ids = client.add_documents(documents=all_splits)
-            print(ids)
-
-
-        return {"message": f"Processed {len(file_names)} file(s) successfully", "data": all_splits}
+            processed_docs.append(doc["data"])
+        # End the read transaction so the connection goes back to the pool
+        # instead of idling in a transaction during the embedding calls
+        await db.commit()
+
+        written_ids = {}
+        try:
+            for doc in processed_docs:
+                all_splits = self.load_and_chunk_pdf(project_name, doc.filename, chunk_size, chunk_overlap)
+                # Stored as indexed columns (see METADATA_COLUMNS) for scoped retrieval
+                for split in all_splits:
+                    split.metadata["project_id"] = str(project.id)
+                    split.metadata["document_id"] = str(doc.id)
+                written_ids[doc.id] = await client.aadd_documents(documents=all_splits)
+                logger.info(f"Embedded {len(written_ids[doc.id])} chunks of '{doc.filename}' in project '{project_name}'")
+
+            # One transaction for the whole batch. The vector store writes
+            # through its own connection and is not part of it; the rows of a
+            # previous processing run are removed here, with the batch
+            store_table = vector_store_table(settings.VECTOR_TABLE)
+            updated_docs = []
+            async with unit_of_work(db):
+                for doc in processed_docs:
+                    if doc.is_processed:
+                        await ChunksModel().delete_chunks_by_document_id(db, doc.id)
+                    await VectorModel().delete_store_vectors_by_document_id(db, store_table, doc.id, keep_ids=written_ids[doc.id])
+                    updated_docs.append(await DocumentsModel().update_document(db, doc.id))
+                await answer_cache.notify(db, project_name)
+        except Exception:
+            # Don't leave vectors of documents that are not marked processed
+            new_ids = [i for ids in written_ids.values() for i in ids]
+            if new_ids:
+                try:
+                    await client.adelete(ids=new_ids)
+                    logger.warning(f"Processing failed; removed {len(new_ids)} vectors written for project '{project_name}'")
+                except Exception as e:
+                    logger.error(f"Processing failed and its vectors could not be removed, clean up ids {new_ids} - {str(e)}")
+            raise
+
+        return {"message": f"Processed {len(updated_docs)} file(s) successfully", "data": updated_docs}
 
     # ------------------------- Get Document -------------------------
     async def get_by_project_id_and_filename(self, db: AsyncSession, project_id: UUID, filename: str):
         doc = await DocumentsModel().search_document(db, DocumentSearch(project_id=project_id, filename=filename))
         return {"message": "Document retrieved", "data": doc}
 
-    async def get_docs(self, db: AsyncSession, project_name: str, filter: str, offset: int = 0, limit: int = 10):
+    async def get_docs(self, db: AsyncSession, project_name: str, filter: str, offset: int = 0, limit: int = 10, cursor: Optional[str] = None, include_total: bool = True):
         project_search = ProjectSearch(name=project_name)
         project = await ProjectModel().search_by_name(db, project_search)
         if not project:
@@ -158,15 +195,15 @@ class DocumentsController(BaseController):
 
         match filter:
             case "all":
-                docs = await DocumentsModel().list_documents(db, project.id, offset, limit)
+                docs = await DocumentsModel().list_documents(db, project.id, offset, limit, cursor, include_total)
             case "processed":
-                docs = await DocumentsModel().list_processed_documents(db, project.id, offset, limit)
+                docs = await DocumentsModel().list_processed_documents(db, project.id, offset, limit, cursor, include_total)
             case "unprocessed":
-                docs = await DocumentsModel().list_unprocessed_documents(db, project.id, offset, limit)
+                docs = await DocumentsModel().list_unprocessed_documents(db, project.id, offset, limit, cursor, include_total)
             case "flushed":
-                docs = await DocumentsModel().list_flushed_documents(db, project.id, offset, limit)
+                docs = await DocumentsModel().list_flushed_documents(db, project.id, offset, limit, cursor, include_total)
             case "unflushed":
-                docs = await DocumentsModel().list_unflushed_documents(db, project.id, offset, limit)
+                docs = await DocumentsModel().list_unflushed_documents(db, project.id, offset, limit, cursor, include_total)
 
         return {"message": f"Retrieved documents with filter '{filter}'", "data": docs}
 
@@ -178,11 +215,17 @@ class DocumentsController(BaseController):
             raise ValueError(f"Project '{del_data.project_name}' does not exist")
 
         doc_data = DocumentDelete(project_id=project.id, filename=del_data.filename)
+        async with unit_of_work(db):
+            deleted_doc = await DocumentsModel().del_document(db, doc_data)
+            if deleted_doc:
+                store_table = vector_store_table(settings.VECTOR_TABLE)
+                await VectorModel().delete_store_vectors_by_document_id(db, store_table, deleted_doc.id)
+                await answer_cache.notify(db, del_data.project_name)
+
+        # Only once the rows are gone, so a failed delete keeps its file
         file_path = self.ASSETS_DIR / del_data.project_name / del_data.filename
         if file_path.exists():
             file_path.unlink()
-
-        deleted_doc = await DocumentsModel().del_document(db, doc_data)
         return {"message": f"Deleted document '{del_data.filename}'", "data": deleted_doc}
 
     # ------------------------- Flush Documents -------------------------
@@ -192,14 +235,31 @@ class DocumentsController(BaseController):
         if not project:
             raise ValueError(f"Project '{project_name}' does not exist")
 
-        updated_docs = []
-        for file in filenames:
-            file_path = self.ASSETS_DIR / project_name / file
+        updated_docs, failed, flushed_paths = [], [], []
+        async with unit_of_work(db):
+            for file in filenames:
+                doc = await self.get_by_project_id_and_filename(db, project.id, file)
+                if not doc["data"]:
+                    continue
+                # A savepoint per file: one failure rolls back only that file
+                try:
+                    async with db.begin_nested():
+                        updated_doc = await DocumentsModel().flush_document(db, doc["data"].id)
+                    updated_docs.append(updated_doc)
+                    flushed_paths.append(self.ASSETS_DIR / project_name / file)
+                except Exception as e:
+                    logger.error(f"Failed to flush '{file}' in project '{project_name}': {e}")
+                    failed.append(file)
+            if updated_docs:
+                await answer_cache.notify(db, project_name)
+
+        # Files go only after the commit: a failed file, or a failed commit,
+        # leaves the PDF behind its still-unflushed row
+        for file_path in flushed_paths:
             if file_path.exists():
                 file_path.unlink()
-            doc = await self.get_by_project_id_and_filename(db, project.id, file)
-            if doc["data"]:
-                updated_doc = await DocumentsModel().flush_document(db, doc["data"].id)
-                updated_docs.append(updated_doc)
 
-        return {"message": f"Flushed {len(updated_docs)} document(s)", "data": updated_docs}
+        msg = f"Flushed {len(updated_docs)} document(s)"
+        if failed:
+            msg += f"; failed: {', '.join(failed)}"
+        return {"message": msg, "data": updated_docs}
@@ -1,7 +1,9 @@
 from sqlalchemy.ext.asyncio import AsyncSession
+from agents.answer_cache import answer_cache
 from models.postgres.ProjectsModel import ProjectModel
 from routes.schemes.projects import ProjectCreateRequest, ProjectDeleteRequest, ProjectListRequest, ProjectSearchRequest, ProjectUpdateRequest
 from routes.exceptions import NotPermitted, ProjectNotFound, ProjectExists, DatabaseError
+from helpers.db_connection import unit_of_work
 from helpers.logger import get_logger
 import shutil
 from pathlib import Path
@@ -22,7 +24,8 @@ class ProjectsController:
         project_path.mkdir(parents=True, exist_ok=False)
 
         try:
-            project = await project_model.insert_project(db, data)
+            async with unit_of_work(db):
+                project = await project_model.insert_project(db, data)
             logger.info(f"Project '{data.name}' created successfully")
             return {"data": project, "message": "Project created successfully"}
         except Exception as e:
@@ -35,6 +38,8 @@ class ProjectsController:
             projects = await project_model.list_projects(db, data)
             logger.info("Projects retrieved successfully")
             return {"data": projects, "message": "Projects retrieved successfully"}
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"Failed to list projects: {e}")
             raise DatabaseError(str(e))
@@ -62,10 +67,12 @@ class ProjectsController:
                 raise ProjectNotFound(f"Project '{data.old_name}' not found in filesystem")
             old_path.rename(new_path)
 
-        project = await project_model.update_project(db, data)
-        if not project:
-            logger.warning(f"Project '{data.old_name}' not found in database")
-            raise ProjectNotFound(f"Project '{data.old_name}' not found")
+        async with unit_of_work(db):
+            project = await project_model.update_project(db, data)
+            if not project:
+                logger.warning(f"Project '{data.old_name}' not found in database")
+                raise ProjectNotFound(f"Project '{data.old_name}' not found")
+            await answer_cache.notify(db, data.old_name)
         logger.info(f"Project '{data.old_name}' updated successfully")
         return {"data": project, "message": "Project updated successfully"}
 
@@ -81,10 +88,12 @@ class ProjectsController:
             logger.info(f"Filesystem for project '{data.name}' deleted")
 
         try:
-            deleted = await project_model.del_project(db, data)
-            if not deleted:
-                logger.warning(f"Project '{data.name}' not found in database")
-                raise ProjectNotFound(f"Project '{data.name}' not found")
+            async with unit_of_work(db):
+                deleted = await project_model.del_project(db, data)
+                if not deleted:
+                    logger.warning(f"Project '{data.name}' not found in database")
+                    raise ProjectNotFound(f"Project '{data.name}' not found")
+                await answer_cache.notify(db, data.name)
             logger.info(f"Project '{data.name}' deleted successfully")
             return {"data": deleted, "message": "Project deleted successfully"}
         except Exception as e:
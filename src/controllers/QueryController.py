@@ -0,0 +1,490 @@
+import asyncio
+import functools
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Set
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from agents.answer_cache import answer_cache
+from agents.parallel_fanout import FANOUT_TOOL_NAME
+from agents.single_flight import query_flights
+from agents.request_context import (
+    PrefetchedHits,
+    RetrievalOptions,
+    RetrievalScope,
+    normalize_query,
+    prefetched_hits,
+    remaining_budget,
+    request_deadline,
+    retrieval_options,
+    retrieval_scope,
+)
+from models.postgres.DocumentsModel import DocumentsModel
+from models.postgres.ProjectsModel import ProjectModel
+from models.postgres.ProjectUserModel import ProjectUserModel
+from models.postgres.operations_schema.documents import DocumentSearch
+from models.postgres.operations_schema.projects import ProjectSearch
+from routes.exceptions import DatabaseError, NotPermitted, ProjectNotFound
+from routes.schemes.query import BatchQueryRequest, QueryRequest
+from helpers import settings
+from helpers.db_connection import async_session, unit_of_work
+from helpers.logger import get_logger
+
+logger = get_logger("QueryController")
+
+BATCH_EMBED_SIZE = 64  # questions per embedding request
+
+
+class QueryController:
+
+    # ------------------------- Helpers -------------------------
+    def build_payload(self, query: str, history: List[Dict[str, str]] = None) -> Dict[str, Any]:
+        return {
+            "messages": [
+                {"role": "system", "content": "You are the user‑facing supervisor agent."},
+                *(history or []),
+                {"role": "user", "content": query}
+            ]
+        }
+
+    def build_agent_payload(self, query: str, history: List[Dict[str, str]] = None) -> Dict[str, Any]:
+        return {"messages": [*(history or []), {"role": "user", "content": query}]}
+
+    def extract_answer(self, result: Any) -> Dict[str, Any]:
+        # Extract agent traces
+        agent_traces = getattr(result, "agent_traces", None) or result.get("agent_traces", [])
+
+        # Extract final answer (handle both dict and AIMessage formats)
+        final_answer = getattr(result, "content", None) or result.get("final_answer", None)
+        if not final_answer:
+            # fallback if result.messages exists
+            messages = getattr(result, "messages", None) or result.get("messages", [])
+            if messages:
+                final_answer = getattr(messages[-1], "content", None) or messages[-1].get("content")
+
+        # Log minimal info per agent (optional, you already log in Supervisor)
+        for trace in agent_traces:
+            agent_name = trace.get("agent_name")
+            query_part = trace.get("arguments")
+            response = trace.get("response")
+            logger.info(
+                f"[AGENT TRACE] Agent: {agent_name}, "
+                f"Query type: {type(query_part).__name__}, "
+                f"Response type: {type(response).__name__}"
+            )
+
+        # Build list of agents used
+        agents_used = [trace.get("agent_name") for trace in agent_traces]
+
+        return {"final_answer": final_answer, "agents_used": agents_used}
+
+    def agents_in_run(self, state: Optional[Dict[str, Any]], answer: Dict[str, Any]) -> Set[str]:
+        # Every agent the run reached: handoffs, fan-out branches and replies
+        agents = set(answer["agents_used"])
+        messages = state.get("messages", []) if isinstance(state, dict) else []
+        for message in messages:
+            if getattr(message, "type", None) == "ai" and getattr(message, "name", None):
+                agents.add(message.name)
+            for call in getattr(message, "tool_calls", None) or []:
+                if call["name"].startswith("transfer_to_"):
+                    agents.add(call["name"][len("transfer_to_"):])
+                elif call["name"] == FANOUT_TOOL_NAME:
+                    agents.update(call["args"].get("agents", []))
+        return agents
+
+    def extract_partial_answer(self, state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        # Best answer reached before the deadline: the latest finished agent reply
+        for message in reversed((state or {}).get("messages", [])):
+            if getattr(message, "type", None) == "ai" and message.content and not getattr(message, "tool_calls", None):
+                return {"final_answer": message.content, "agents_used": [message.name] if message.name else []}
+        return {"final_answer": None, "agents_used": []}
+
+    async def resolve_scope(self, db: AsyncSession, data: QueryRequest, current_user: dict) -> RetrievalScope:
+        if not data.project_name:
+            # An unscoped search reads every project's vectors: admins only
+            if current_user["role"] != 0:
+                logger.warning(f"User {current_user['id']} sent a query without a project")
+                raise NotPermitted()
+            return RetrievalScope(metadata=data.metadata_filter or {})
+
+        project = await ProjectModel().search_by_name(db, ProjectSearch(name=data.project_name))
+        if not project:
+            raise ProjectNotFound(f"Project '{data.project_name}' not found")
+
+        if current_user["role"] != 0:
+            if not await ProjectUserModel().user_has_access(db, current_user["id"], project.id):
+                logger.warning(f"User {current_user['id']} has no access to project '{data.project_name}'")
+                raise NotPermitted()
+
+        document_ids = []
+        for file_name in data.file_names or []:
+            document = await DocumentsModel().search_document(db, DocumentSearch(project_id=project.id, filename=file_name))
+            if not document:
+                raise ValueError(f"File '{file_name}' not found in project '{data.project_name}'")
+            document_ids.append(document.id)
+
+        return RetrievalScope(
+            project_id=project.id,
+            document_ids=tuple(document_ids),
+            metadata=data.metadata_filter or {},
+        )
+
+    @contextmanager
+    def deadline_context(self) -> Iterator[None]:
+        token = request_deadline.set(time.monotonic() + settings.QUERY_DEADLINE_SECONDS)
+        try:
+            yield
+        finally:
+            request_deadline.reset(token)
+
+    @contextmanager
+    def retrieval_context(self, data: QueryRequest, scope: RetrievalScope) -> Iterator[None]:
+        options_token = retrieval_options.set(
+            RetrievalOptions(mmr=data.mmr, lambda_mult=data.mmr_lambda, fetch_k=data.mmr_fetch_k)
+        )
+        scope_token = retrieval_scope.set(scope)
+        try:
+            yield
+        finally:
+            retrieval_scope.reset(scope_token)
+            retrieval_options.reset(options_token)
+
+    async def load_history(self, db: AsyncSession, conversation_memory, data: QueryRequest, scope: RetrievalScope, current_user: dict) -> List[Dict[str, str]]:
+        if not (conversation_memory and data.use_history and scope.project_id):
+            return []
+        return await conversation_memory.load(db, current_user["id"], scope.project_id)
+
+    async def record_turn(self, db: AsyncSession, conversation_memory, data: QueryRequest, scope: RetrievalScope, current_user: dict, answer: Dict[str, Any]) -> None:
+        if not (conversation_memory and data.use_history and scope.project_id and answer["final_answer"]):
+            return
+        try:
+            async with unit_of_work(db):
+                await conversation_memory.record(db, current_user["id"], scope.project_id, data.query, answer["final_answer"])
+        except (DatabaseError, SQLAlchemyError) as e:
+            # The answer is already computed; losing one turn beats failing the request
+            logger.warning(f"Failed to record conversation turn - {str(e)}")
+
+    async def pre_route(self, embedding_service, fast_router, data: QueryRequest, scope: RetrievalScope, cacheable: bool = True, query_vector: Optional[List[float]] = None):
+        """
+        Embed the question once for both the answer cache and the fast-path
+        router (unless query_vector is already known). Returns (cache_vector,
+        cached_answer, (agent_name, confidence)), agent_name being None when
+        the supervisor should route. Cache entries are keyed by project only,
+        so unscoped questions, narrower scopes, MMR re-ranking and follow-up
+        questions (cacheable=False) bypass the cache.
+        """
+        use_cache = (
+            settings.ANSWER_CACHE_ENABLED and cacheable and scope.project_id is not None
+            and not (scope.document_ids or scope.metadata or data.mmr)
+        )
+        if not use_cache and fast_router is None:
+            return None, None, (None, 0.0)
+
+        if query_vector is None:
+            query_vector = await embedding_service.aembed_query(data.query)
+        if use_cache:
+            cached = answer_cache.lookup(data.project_name, query_vector)
+            if cached:
+                return query_vector, cached, (None, 0.0)
+
+        route = fast_router.route(query_vector) if fast_router else (None, 0.0)
+        return (query_vector if use_cache else None), None, route
+
+    def flight_key(self, data: QueryRequest, scope: RetrievalScope) -> tuple:
+        # Everything that changes the answer: project, normalized question, narrowing and retrieval knobs
+        return (
+            data.project_name,
+            normalize_query(data.query),
+            scope.document_ids,
+            json.dumps(scope.metadata, sort_keys=True, default=str),
+            (data.mmr, data.mmr_lambda, data.mmr_fetch_k) if data.mmr else None,
+        )
+
+    def select_graph(self, supervisor_agent, fast_router, fast_agent: Optional[str], query: str, history: List[Dict[str, str]]):
+        """Return (graph, payload, time budget) for the supervisor or a fast-path agent."""
+        if fast_agent:
+            return fast_router.agents[fast_agent], self.build_agent_payload(query, history), settings.AGENT_TIMEOUT_SECONDS
+        return supervisor_agent, self.build_payload(query, history), None
+
+    async def run_graph(self, graph, payload: Dict[str, Any], timeout: Optional[float]):
+        """
+        Run the graph to completion within timeout. On timeout the run is
+        cancelled, which aborts its in-flight LLM and DB calls, and the last
+        complete state is returned with partial=True.
+        """
+        state = None
+        try:
+            async with asyncio.timeout(timeout):
+                async for state in graph.astream(payload, stream_mode="values"):
+                    pass
+        except TimeoutError:
+            logger.warning(f"Agent run hit its {timeout:.1f}s budget; returning partial answer")
+            return state, True
+        return state, False
+
+    async def iterate_with_deadline(self, stream: AsyncIterator[Any], timeout: Optional[float]) -> AsyncIterator[Any]:
+        """
+        Relay items of an async iterator until it ends; raise TimeoutError once
+        timeout passes. The iterator is pumped by its own task, so the deadline
+        never fires while the consumer holds a yielded item, and the task is
+        cancelled on timeout or when the consumer goes away (client disconnect).
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+
+        async def pump():
+            try:
+                async for item in stream:
+                    await queue.put(item)
+                await queue.put(finished)
+            except Exception as e:
+                await queue.put(e)
+
+        task = asyncio.create_task(pump())
+        try:
+            while True:
+                wait = None if deadline is None else max(deadline - loop.time(), 0.0)
+                item = await asyncio.wait_for(queue.get(), wait)
+                if item is finished:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            task.cancel()
+
+    def format_sse(self, event: str, data: Any) -> str:
+        return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+    async def run_question(
+        self,
+        supervisor_agent,
+        fast_router,
+        embedding_service,
+        data: QueryRequest,
+        scope: RetrievalScope,
+        history: List[Dict[str, str]],
+        query_vector: Optional[List[float]] = None,
+    ) -> Dict[str, Any]:
+        """Answer one question (cache, fast path or supervisor) within the current request deadline."""
+        cache_vector, cached, (fast_agent, _) = await self.pre_route(
+            embedding_service, fast_router, data, scope, cacheable=not history, query_vector=query_vector
+        )
+        if cached:
+            return {**cached, "cached": True, "partial": False}
+
+        graph, payload, budget = self.select_graph(supervisor_agent, fast_router, fast_agent, data.query, history)
+        with self.retrieval_context(data, scope):
+            run = functools.partial(self.run_graph, graph, payload, remaining_budget(budget))
+            if settings.SINGLE_FLIGHT_ENABLED and not history:
+                # Identical concurrent questions share one agent run
+                state, partial = await query_flights.do(self.flight_key(data, scope), run)
+            else:
+                state, partial = await run()
+
+        answer = self.extract_partial_answer(state) if partial else self.extract_answer(state or {})
+        if fast_agent:
+            answer["agents_used"] = [fast_agent]
+
+        if cache_vector is not None and answer["final_answer"] and not partial:
+            answer_cache.store(data.project_name, cache_vector, answer, agents=self.agents_in_run(state, answer))
+
+        return {**answer, "cached": False, "partial": partial}
+
+    # ------------------------- Answer Question -------------------------
+    async def answer_question(self, db: AsyncSession, supervisor_agent, fast_router, conversation_memory, embedding_service, data: QueryRequest, current_user: dict):
+        with self.deadline_context():
+            scope = await self.resolve_scope(db, data, current_user)
+            history = await self.load_history(db, conversation_memory, data, scope, current_user)
+            # End the read transaction so the connection goes back to the pool
+            # during the agent run; record_turn begins a fresh one
+            await db.commit()
+            answer = await self.run_question(supervisor_agent, fast_router, embedding_service, data, scope, history)
+
+        if not answer["cached"]:
+            await self.record_turn(db, conversation_memory, data, scope, current_user, answer)
+
+        return {"message": None, "data": answer}
+
+    # ------------------------- Answer Batch -------------------------
+    async def answer_batch(
+        self,
+        supervisor_agent,
+        fast_router,
+        embedding_service,
+        rag_retriever,
+        data: BatchQueryRequest,
+        scope: RetrievalScope,
+    ) -> AsyncIterator[str]:
+        """
+        NDJSON, one line per question in completion order:
+          {"index", "query", "final_answer", "agents_used", "cached", "partial", "latency_ms", "error"}
+        All questions are embedded in batched calls and their top-k chunks
+        fetched in one query up front; at most data.concurrency agent runs are
+        in flight, each under its own deadline. Pending runs are cancelled
+        when the client disconnects.
+        """
+        started = time.perf_counter()
+        try:
+            vectors: List[List[float]] = []
+            for i in range(0, len(data.questions), BATCH_EMBED_SIZE):
+                vectors.extend(await embedding_service.aembed_documents(data.questions[i:i + BATCH_EMBED_SIZE]))
+
+            prefetched = {}
+            if rag_retriever is not None and not data.mmr:
+                prefetched = await rag_retriever.prefetch(data.questions, vectors, scope)
+        except Exception as e:
+            logger.exception(f"Batch preparation failed - {str(e)}")
+            yield json.dumps({"error": "Unexpected error"}) + "\n"
+            return
+        logger.info(f"Prepared batch of {len(data.questions)} questions in {time.perf_counter() - started:.2f}s")
+
+        semaphore = asyncio.Semaphore(data.concurrency)
+
+        async def answer_one(index: int, question: str, vector: List[float]) -> Dict[str, Any]:
+            async with semaphore:
+                item_started = time.perf_counter()
+                item = QueryRequest(
+                    query=question,
+                    project_name=data.project_name,
+                    file_names=data.file_names,
+                    metadata_filter=data.metadata_filter,
+                    use_history=False,
+                    mmr=data.mmr,
+                    mmr_lambda=data.mmr_lambda,
+                    mmr_fetch_k=data.mmr_fetch_k,
+                )
+                if index in prefetched:
+                    # This task's own context: only this question's run sees them
+                    prefetched_hits.set(PrefetchedHits(prefetched[index]))
+                try:
+                    with self.deadline_context():
+                        result = {**await self.run_question(supervisor_agent, fast_router, embedding_service, item, scope, [], query_vector=vector), "error": None}
+                except Exception as e:
+                    logger.error(f"Batch question {index} failed - {str(e)}")
+                    result = {"final_answer": None, "agents_used": [], "cached": False, "partial": False, "error": "Unexpected error"}
+                latency_ms = round((time.perf_counter() - item_started) * 1000)
+                return {"index": index, "query": question, **result, "latency_ms": latency_ms}
+
+        tasks = [asyncio.create_task(answer_one(i, q, v)) for i, (q, v) in enumerate(zip(data.questions, vectors))]
+
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(jsonable_encoder(await next_done)) + "\n"
+            logger.info(f"Answered batch of {len(tasks)} questions in {time.perf_counter() - started:.2f}s")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    # ------------------------- Stream Answer -------------------------
+    async def stream_answer(
+        self,
+        supervisor_agent,
+        fast_router,
+        conversation_memory,
+        embedding_service,
+        data: QueryRequest,
+        scope: RetrievalScope,
+        history: List[Dict[str, str]],
+        current_user: dict,
+    ) -> AsyncIterator[str]:
+        """
+        Server-sent events for one question:
+          route    - the question was handed to a sub-agent (fast_path: routed locally)
+          progress - a sub-agent called a tool, got its result, or answered
+          token    - a chunk of the final answer
+          done     - the final answer (same shape as POST /query)
+          error    - the run failed; no done event follows
+        The run is cancelled when the client disconnects or the deadline passes.
+        """
+        try:
+            with self.deadline_context():
+                cache_vector, cached, (fast_agent, confidence) = await self.pre_route(embedding_service, fast_router, data, scope, cacheable=not history)
+                if cached:
+                    yield self.format_sse("done", {**cached, "cached": True, "partial": False})
+                    return
+
+                if fast_agent:
+                    yield self.format_sse("route", {"agent": fast_agent, "fast_path": True, "confidence": confidence})
+                    # The sub-agent is the root graph here, so its own nodes report at namespace ()
+                    root_agent, answering_agent = fast_agent, fast_agent
+                else:
+                    root_agent, answering_agent = None, supervisor_agent.name
+                graph, payload, budget = self.select_graph(supervisor_agent, fast_router, fast_agent, data.query, history)
+
+                final_state: Optional[Dict[str, Any]] = None
+                partial = False
+
+                with self.retrieval_context(data, scope):
+                    try:
+                        events = graph.astream(payload, stream_mode=["updates", "messages", "values"], subgraphs=True)
+                        async for namespace, mode, chunk in self.iterate_with_deadline(events, remaining_budget(budget)):
+                            agent = namespace[0].split(":")[0] if namespace else root_agent
+
+                            if mode == "values":
+                                if not namespace:
+                                    final_state = chunk
+
+                            elif mode == "messages":
+                                message, _ = chunk
+                                if (
+                                    agent == answering_agent
+                                    and getattr(message, "type", None) in ("ai", "AIMessageChunk")
+                                    and isinstance(message.content, str)
+                                    and message.content
+                                ):
+                                    yield self.format_sse("token", {"content": message.content})
+
+                            elif mode == "updates":
+                                for event, event_data in self.describe_update(agent, supervisor_agent.name, chunk):
+                                    yield self.format_sse(event, event_data)
+                    except TimeoutError:
+                        logger.warning("Streamed agent run hit its budget; returning partial answer")
+                        partial = True
+
+            answer = self.extract_partial_answer(final_state) if partial else self.extract_answer(final_state or {})
+            if fast_agent:
+                answer["agents_used"] = [fast_agent]
+            if cache_vector is not None and answer["final_answer"] and not partial:
+                answer_cache.store(data.project_name, cache_vector, answer, agents=self.agents_in_run(final_state, answer))
+
+            # The route's session was released before streaming started
+            async with async_session() as db:
+                await self.record_turn(db, conversation_memory, data, scope, current_user, answer)
+
+            yield self.format_sse("done", {**answer, "cached": False, "partial": partial})
+
+        except Exception as e:
+            logger.exception(f"Streaming answer failed - {str(e)}")
+            yield self.format_sse("error", {"message": "Unexpected error"})
+
+    def describe_update(self, agent: Optional[str], supervisor_name: str, update: Dict[str, Any]):
+        # Only subgraph updates are inspected: the root-level ones repeat the
+        # sub-agents' whole message history on every handoff.
+        for node, node_update in update.items():
+            messages = (node_update or {}).get("messages", []) if isinstance(node_update, dict) else []
+            for message in messages:
+                tool_calls = getattr(message, "tool_calls", None) or []
+                cache_hit = bool((getattr(message, "response_metadata", None) or {}).get("cache_hit"))
+
+                if agent == supervisor_name:
+                    for call in tool_calls:
+                        if call["name"].startswith("transfer_to_"):
+                            yield "route", {"agent": call["name"][len("transfer_to_"):], "llm_cache_hit": cache_hit}
+                        elif call["name"] == FANOUT_TOOL_NAME:
+                            for name in call["args"].get("agents", []):
+                                yield "route", {"agent": name, "parallel": True, "llm_cache_hit": cache_hit}
+
+                elif agent is not None:
+                    if tool_calls:
+                        yield "progress", {"agent": agent, "step": "tool_call", "tools": [c["name"] for c in tool_calls], "llm_cache_hit": cache_hit}
+                    elif getattr(message, "type", None) == "tool":
+                        yield "progress", {"agent": agent, "step": "tool_result", "tool": message.name, "tool_cache_hit": cache_hit}
+                    elif getattr(message, "type", None) == "ai":
+                        yield "progress", {"agent": agent, "step": "answer", "llm_cache_hit": cache_hit}
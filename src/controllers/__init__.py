@@ -1,2 +1,3 @@
 from .ProjectsController import ProjectsController
 from .DocumentsController import DocumentsController
+from .QueryController import QueryController
@@ -1,2 +1,2 @@
 from .config import settings
-from .db_connection import engine, async_session
+from .db_connection import engine, async_session, read_engine, read_session, unit_of_work
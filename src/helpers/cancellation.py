@@ -0,0 +1,26 @@
+# helpers/cancellation.py
+import asyncio
+from typing import Any, Awaitable
+
+from fastapi import Request
+
+from routes.exceptions import ClientDisconnected
+
+
+async def run_until_disconnected(request: Request, awaitable: Awaitable[Any], poll_interval: float = 0.5) -> Any:
+    """
+    Await `awaitable` in its own task, cancelling it (and with it any in-flight
+    LLM / DB call) as soon as the client goes away.
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
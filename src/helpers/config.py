@@ -12,6 +12,18 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     POSTGRES_HOST: str
     POSTGRES_PORT: int
+    # Optional replica for read-only traffic (listing, retrieval, SQL agent)
+    POSTGRES_READ_HOST: str | None = None
+    POSTGRES_READ_PORT: int | None = None
+
+    # Connection pool per engine and worker process
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Prepared statements cached per connection; 0 behind pgbouncer transaction pooling
+    DB_STATEMENT_CACHE_SIZE: int = 100
 
     GROQ_API_KEY: str
     GROQ_BASE_URL: str
@@ -29,6 +41,103 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int
     SECRET_KEY: str
     ALGORITHM: str
+
+    # Semantic answer cache for /query
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    ANSWER_CACHE_TTL_SECONDS: int = 900
+    ANSWER_CACHE_MAX_ENTRIES: int = 500
+    ANSWER_CACHE_SKIP_AGENTS: list[str] = ["sql_agent", "web_agent"]
+
+    # Context packing for the RAG retrieval tool
+    RAG_CONTEXT_TOKEN_BUDGET: int = 1500
+    RAG_MAX_DISTANCE: float = 0.7
+
+    # Embedding fast-path router in front of the supervisor
+    FAST_ROUTER_ENABLED: bool = True
+    FAST_ROUTER_THRESHOLD: float = 0.75
+    FAST_ROUTER_MARGIN: float = 0.05
+    FAST_ROUTER_EXAMPLES: dict[str, list[str]] | None = None  # per agent; None uses the built-in examples
+
+    # Concurrent rag_agent + sql_agent fan-out for ambiguous queries
+    FANOUT_ENABLED: bool = True
+    FANOUT_BRANCH_TIMEOUT_SECONDS: float = 30.0
+
+    # Request deadline and per-agent / per-call budgets
+    QUERY_DEADLINE_SECONDS: float = 90.0
+    AGENT_TIMEOUT_SECONDS: float = 45.0
+    LLM_TIMEOUT_SECONDS: float = 30.0
+    LLM_MAX_RETRIES: int = 1
+    RAG_TOOL_TIMEOUT_SECONDS: float = 10.0
+    SQL_STATEMENT_TIMEOUT_MS: int = 10000
+
+    # LLM response cache (used only when TEMPERATURE is 0)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str = "llm_cache.sqlite3"
+    LLM_CACHE_TTL_SECONDS: int = 86400
+    LLM_CACHE_MAX_ENTRIES: int = 10000
+
+    # Coalesce identical in-flight /query requests onto one agent run
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    # Client-side rate limits for outbound model calls (0 = no per-minute limit);
+    # set the token budget to your provider tier's limit
+    LLM_REQUESTS_PER_MINUTE: int = 60
+    LLM_TOKENS_PER_MINUTE: int = 0
+    LLM_MAX_CONCURRENCY: int = 8
+    EMBEDDING_REQUESTS_PER_MINUTE: int = 0
+    EMBEDDING_TOKENS_PER_MINUTE: int = 0
+    EMBEDDING_MAX_CONCURRENCY: int = 8
+
+    # Conversation history window for /query
+    HISTORY_MAX_TURNS: int = 6
+    HISTORY_TOKEN_BUDGET: int = 1000
+    HISTORY_SUMMARIZE_EVERY: int = 6
+
+    # Tables / columns the SQL agent can see, and its schema snapshot
+    SQL_AGENT_ALLOWED_COLUMNS: dict[str, list[str]] = {
+        "users": ["id", "username", "role", "created_at"],
+        "projects": ["id", "name", "description", "created_at"],
+        "project_users": ["id", "project_id", "user_id"],
+        "documents": ["id", "project_id", "filename", "is_processed", "is_flushed", "created_at"],
+    }
+    SQL_SCHEMA_SAMPLE_ROWS: int = 3
+    SQL_SCHEMA_REFRESH_SECONDS: int = 600
+
+    # Concurrency cap on the shared pool and EXPLAIN guard for SQL agent queries
+    SQL_AGENT_MAX_CONCURRENCY: int = 5
+    SQL_MAX_PLAN_COST: float = 100000
+    SQL_MAX_PLAN_ROWS: int = 100000
+    SQL_MAX_RESULT_ROWS: int = 50
+    # Role the SQL agent's queries run as; its column grants enforce the allow-list
+    SQL_AGENT_DB_ROLE: str | None = "sql_agent_reader"
+
+    # Tool result caches (SQL entries are also dropped when their tables are written)
+    TOOL_CACHE_ENABLED: bool = True
+    SQL_TOOL_CACHE_TTL_SECONDS: int = 60
+    WEB_TOOL_CACHE_TTL_SECONDS: int = 600
+    TOOL_CACHE_MAX_ENTRIES: int = 1000
+
+    # Startup: agents built on first use, and connection warm-up
+    LAZY_AGENTS: list[str] = ["web_agent"]
+    STARTUP_WARMUP_ENABLED: bool = True
+    STARTUP_WARMUP_DB_CONNECTIONS: int = 5
+
+    # /ready: pg_prewarm of hot relations (VECTOR_TABLE is added) and latency probes
+    PREWARM_ENABLED: bool = True
+    PREWARM_RELATIONS: list[str] = ["idx_vectors_embedding", "vector_embeddings", "chunks"]
+    READY_DB_LATENCY_MS: float = 200
+    READY_EMBEDDING_LATENCY_MS: float = 2000
+    READY_PROBE_INTERVAL_SECONDS: float = 10
+
+    # Project name -> project cache; LISTEN/NOTIFY drops renamed / deleted projects in every worker
+    PROJECT_CACHE_ENABLED: bool = True
+    PROJECT_CACHE_TTL_SECONDS: int = 300
+    PROJECT_CACHE_MAX_ENTRIES: int = 1000
+    PROJECT_CACHE_LISTEN: bool = True
+
+    # Listing totals are counted once per TTL, not on every page
+    LIST_COUNT_CACHE_TTL_SECONDS: int = 30
 @lru_cache
 def get_settings() -> Settings:
     return Settings()
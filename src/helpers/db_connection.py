@@ -1,33 +1,92 @@
 # helpers/db_connect.py
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 from .config import settings
+from .pool_metrics import pool_metrics
 
-DATABASE_URL = (
-    f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}"
-    f"@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
-)
 
-SYNC_DATABASE_URL = (
-    f"postgresql+psycopg2://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}"
-    f"@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
-)
+def _database_url(driver: str, host: str, port: int) -> str:
+    return (
+        f"postgresql+{driver}://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}"
+        f"@{host}:{port}/{settings.POSTGRES_DB}"
+    )
 
-# Create engine once globally
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False
-)
+DATABASE_URL = _database_url("asyncpg", settings.POSTGRES_HOST, settings.POSTGRES_PORT)
+
+# Read-only traffic (listing, retrieval, SQL agent) goes to POSTGRES_READ_HOST
+# when it is set, e.g. a streaming replica; otherwise to the primary
+READ_REPLICA = settings.POSTGRES_READ_HOST is not None
+_read_host = settings.POSTGRES_READ_HOST or settings.POSTGRES_HOST
+_read_port = settings.POSTGRES_READ_PORT or settings.POSTGRES_PORT
+READ_DATABASE_URL = _database_url("asyncpg", _read_host, _read_port)
+
+
+def create_pooled_engine(url: str, **kwargs):
+    """Async engine with the pool and statement-cache settings from Settings."""
+    return create_async_engine(
+        url,
+        echo=False,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            # asyncpg's per-connection cache and SQLAlchemy's prepared statement
+            # cache; both must be 0 behind pgbouncer in transaction mode
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            **kwargs.pop("connect_args", {}),
+        },
+        **kwargs,
+    )
+
+# Create engines once globally. These are the process's only pools: the
+# vector store and the SQL agent get tagged views of them (for_consumer)
+engine = create_pooled_engine(DATABASE_URL)
+read_engine = create_pooled_engine(READ_DATABASE_URL) if READ_REPLICA else engine
+
+pool_metrics.instrument("primary", engine)
+if READ_REPLICA:
+    pool_metrics.instrument("replica", read_engine)
 
-# Async session factory
+def is_primary(db: AsyncSession) -> bool:
+    """Whether db reads from the primary (always true without a replica)."""
+    return db.get_bind().pool is engine.sync_engine.pool
+
+# Async session factories
 async_session = sessionmaker(
     bind=engine,
     expire_on_commit=False,
     class_=AsyncSession
 )
 
-# Dependency for FastAPI
+read_session = sessionmaker(
+    bind=read_engine,
+    expire_on_commit=False,
+    class_=AsyncSession
+)
+
+# Dependencies for FastAPI
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
         yield session
+
+# Reads only: a replica may lag the primary, so do not read back your own writes here
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    async with read_session() as session:
+        yield session
+
+# Unit of work: models only flush; the controller wraps a request's writes in
+# one of these so they commit (or roll back) together. Per-item failures that
+# must not sink the batch go in db.begin_nested() savepoints inside it
+@asynccontextmanager
+async def unit_of_work(db: AsyncSession) -> AsyncGenerator[AsyncSession, None]:
+    try:
+        yield db
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
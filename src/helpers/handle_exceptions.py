@@ -1,6 +1,6 @@
 from functools import wraps
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from helpers.logger import get_logger
 from middlewares.auth_middleware import current_user_id
 from routes.exceptions import *
@@ -16,6 +16,10 @@ def handle_exceptions(fn):
             result = await fn(*args, **kwargs)
             logger.info(f"Success: {fn.__name__} [user={user}]")
 
+            # Routes that build their own response (e.g. streaming) pass through
+            if isinstance(result, Response):
+                return result
+
             # Standardize response
             return JSONResponse(
                 status_code=200,
@@ -55,6 +59,10 @@ def handle_exceptions(fn):
             logger.warning(f"ProjectExists: {fn.__name__} [user={user}] - {str(e)}")
             return JSONResponse(status_code=400, content={"success": False, "message": str(e), "data": None})
 
+        except ClientDisconnected:
+            logger.warning(f"ClientDisconnected: {fn.__name__} [user={user}] - request cancelled")
+            return JSONResponse(status_code=499, content={"success": False, "message": "Client closed request", "data": None})
+
         except DatabaseError as e:
             logger.error(f"DatabaseError: {fn.__name__} [user={user}] - {str(e)}")
             return JSONResponse(status_code=500, content={"success": False, "message": "Internal server error", "data": None})
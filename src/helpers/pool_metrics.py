@@ -0,0 +1,84 @@
+# helpers/pool_metrics.py
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+CONSUMER_OPTION = "pool_consumer"
+DEFAULT_CONSUMER = "api"
+
+
+def for_consumer(engine: AsyncEngine, consumer: str) -> AsyncEngine:
+    """A view of the engine (same pool) whose checkouts are counted under consumer."""
+    return engine.execution_options(**{CONSUMER_OPTION: consumer})
+
+
+class PoolMetrics:
+    """
+    Connection usage of the shared pools, per pool and per consumer. Every
+    checkout is attributed to the consumer its engine view was tagged with
+    (see for_consumer); untagged checkouts count as "api".
+    """
+
+    def __init__(self):
+        self._engines: Dict[str, AsyncEngine] = {}
+        self._consumers: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def instrument(self, name: str, engine: AsyncEngine) -> None:
+        self._engines[name] = engine
+
+        @event.listens_for(engine.sync_engine, "engine_connect")
+        def _checked_out(conn):
+            consumer = conn.get_execution_options().get(CONSUMER_OPTION, DEFAULT_CONSUMER)
+            conn.info[CONSUMER_OPTION] = (consumer, time.monotonic())
+            with self._lock:
+                stats = self._consumers.setdefault(consumer, {
+                    "checkouts": 0, "in_use": 0, "peak_in_use": 0, "hold_seconds": 0.0, "max_hold_seconds": 0.0,
+                })
+                stats["checkouts"] += 1
+                stats["in_use"] += 1
+                stats["peak_in_use"] = max(stats["peak_in_use"], stats["in_use"])
+
+        @event.listens_for(engine.sync_engine.pool, "checkin")
+        def _checked_in(dbapi_connection, connection_record):
+            # Raw checkouts (dialect setup, pre-ping) never went through engine_connect
+            tagged = connection_record.info.pop(CONSUMER_OPTION, None)
+            if tagged is None:
+                return
+            consumer, checked_out_at = tagged
+            held = time.monotonic() - checked_out_at
+            with self._lock:
+                stats = self._consumers[consumer]
+                stats["in_use"] -= 1
+                stats["hold_seconds"] += held
+                stats["max_hold_seconds"] = max(stats["max_hold_seconds"], held)
+
+    def snapshot(self) -> Dict[str, Any]:
+        pools = {}
+        for name, engine in self._engines.items():
+            pool = engine.sync_engine.pool
+            pools[name] = {
+                "size": pool.size(),
+                "max_overflow": getattr(pool, "_max_overflow", 0),
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            }
+        with self._lock:
+            consumers = {
+                consumer: {
+                    "checkouts": stats["checkouts"],
+                    "in_use": stats["in_use"],
+                    "peak_in_use": stats["peak_in_use"],
+                    "avg_hold_ms": round(stats["hold_seconds"] * 1000 / max(stats["checkouts"] - stats["in_use"], 1), 1),
+                    "max_hold_ms": round(stats["max_hold_seconds"] * 1000, 1),
+                }
+                for consumer, stats in self._consumers.items()
+            }
+        return {"pools": pools, "consumers": consumers}
+
+
+pool_metrics = PoolMetrics()
@@ -0,0 +1,159 @@
+# helpers/project_cache.py
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .logger import get_logger
+
+if TYPE_CHECKING:
+    from models.postgres.operations_schema.projects import ProjectOut
+
+logger = get_logger("project_cache")
+
+CHANNEL = "project_cache_invalidate"
+
+
+class ProjectCache:
+    """
+    Process-local TTL + LRU cache of project name -> ProjectOut, in front of
+    ProjectModel.search_by_name. Only found projects read from the primary
+    are cached, so a new project is visible at once and a replica's stale
+    row never is. Renames and deletes drop the name here and
+    send a NOTIFY when their transaction commits; every worker's listener drops it too. While a
+    worker's listener is down it may miss changes, so nothing is served from
+    its cache until the listener is connected again.
+    """
+
+    def __init__(self, enabled: bool = True, ttl_seconds: float = 300, max_entries: int = 1000):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[ProjectOut, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._listen = False
+        self._listening = False
+        self._task: Optional[asyncio.Task] = None
+        # Other caches' channels sharing the listener connection: (on_message, on_state)
+        self._subscribers: Dict[str, Tuple[Callable[[str], None], Callable[[bool], None]]] = {}
+
+    # ------------------------- Entries -------------------------
+    def get(self, name: str) -> Optional["ProjectOut"]:
+        if not self.enabled or (self._listen and not self._listening):
+            return None
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            project, created_at = entry
+            if time.monotonic() - created_at >= self.ttl_seconds:
+                del self._entries[name]
+                return None
+            self._entries.move_to_end(name)
+            return project
+
+    def set(self, name: str, project: "ProjectOut") -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[name] = (project, time.monotonic())
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, name: str) -> None:
+        with self._lock:
+            dropped = self._entries.pop(name, None)
+        if dropped:
+            logger.info(f"Project cache invalidated [project={name}]")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    # ------------------------- Cross-worker invalidation -------------------------
+    async def notify(self, db: AsyncSession, name: str) -> None:
+        """
+        Drop name here and tell every worker to drop it, once db's transaction
+        commits. Call before commit: Postgres delivers the NOTIFY only if the
+        transaction commits, and a rollback leaves this worker's entry alone.
+        """
+        await db.execute(text("SELECT pg_notify(:channel, :name)"), {"channel": CHANNEL, "name": name})
+        event.listen(db.sync_session, "after_commit", lambda _: self.invalidate(name), once=True)
+
+    def subscribe(self, channel: str, on_message: Callable[[str], None], on_state: Callable[[bool], None]) -> None:
+        """
+        Deliver another channel's NOTIFY payloads to on_message over this
+        listener's connection. on_state(listening) runs on every connect and
+        disconnect, so the subscriber can drop what it may have missed and stop
+        serving while notifications can't reach it. Call before start_listener.
+        """
+        self._subscribers[channel] = (on_message, on_state)
+
+    def _on_notify(self, connection, pid, channel, payload) -> None:
+        if channel == CHANNEL:
+            self.invalidate(payload)
+        else:
+            self._subscribers[channel][0](payload)
+
+    def _set_listening(self, listening: bool) -> None:
+        self._listening = listening
+        for _, on_state in self._subscribers.values():
+            on_state(listening)
+
+    async def _listen_forever(self, dsn: str, retry_seconds: float) -> None:
+        import asyncpg
+
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(dsn)
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _: lost.set())
+                for channel in (CHANNEL, *self._subscribers):
+                    await conn.add_listener(channel, self._on_notify)
+                # Anything cached before now may have changed unnoticed
+                self.clear()
+                self._set_listening(True)
+                logger.info(f"Listening on {', '.join((CHANNEL, *self._subscribers))}")
+                await lost.wait()
+                logger.warning(f"Lost the {CHANNEL} listener connection; reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Project cache listener failed; retrying in {retry_seconds}s - {str(e)}")
+            finally:
+                if self._listening:
+                    self._set_listening(False)
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(retry_seconds)
+
+    def start_listener(self, dsn: str, retry_seconds: float = 5) -> None:
+        """Listen for invalidations on a dedicated connection (outside the pool) for the app's lifetime."""
+        if not self.enabled and not self._subscribers:
+            return
+        self._listen = True
+        self._task = asyncio.create_task(self._listen_forever(dsn, retry_seconds))
+
+    async def stop_listener(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+project_cache = ProjectCache(
+    enabled=settings.PROJECT_CACHE_ENABLED,
+    ttl_seconds=settings.PROJECT_CACHE_TTL_SECONDS,
+    max_entries=settings.PROJECT_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,105 @@
+# helpers/readiness.py
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from .db_connection import READ_REPLICA, engine, read_engine
+from .logger import get_logger
+
+logger = get_logger("readiness")
+
+
+class ReadinessProbe:
+    """
+    Backs GET /ready. After startup, pg_prewarm loads the vector indexes and
+    hot tables into shared buffers (in the background, so /health answers
+    meanwhile); the app reports ready once that is done and the DB and
+    embedding latency probes are under their limits. Probe results are
+    reused for probe_interval seconds so frequent polling stays cheap.
+    """
+
+    def __init__(
+        self,
+        embedding_service: Any,
+        prewarm_relations: List[str],
+        db_latency_ms: float = 200,
+        embedding_latency_ms: float = 2000,
+        probe_interval: float = 10,
+    ):
+        self.embedding_service = embedding_service
+        self.prewarm_relations = prewarm_relations
+        self.db_latency_ms = db_latency_ms
+        self.embedding_latency_ms = embedding_latency_ms
+        self.probe_interval = probe_interval
+        self.prewarm_done = False
+        self.prewarmed: Dict[str, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._last_probe: Tuple[float, Dict[str, Any]] = (0.0, {})
+        self._probe_lock = asyncio.Lock()
+
+    # ------------------------- Prewarm -------------------------
+    def start_prewarm(self) -> None:
+        self._task = asyncio.create_task(self.prewarm())
+
+    async def prewarm(self) -> None:
+        started = time.perf_counter()
+        try:
+            async with engine.connect() as conn:
+                installed = await conn.scalar(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_prewarm'"))
+                if not installed:
+                    logger.warning("pg_prewarm extension is not installed; skipping buffer prewarm")
+                    self.prewarmed = {"skipped": "pg_prewarm not installed"}
+                    return
+                for relation in self.prewarm_relations:
+                    # to_regclass is NULL for a missing relation instead of an error
+                    blocks = await conn.scalar(
+                        text("SELECT pg_prewarm(to_regclass(:relation)) WHERE to_regclass(:relation) IS NOT NULL"),
+                        {"relation": relation},
+                    )
+                    self.prewarmed[relation] = blocks if blocks is not None else "missing"
+                    logger.info(f"Prewarmed {relation}: {self.prewarmed[relation]} blocks")
+            logger.info(f"Buffer prewarm finished in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            # A failed prewarm only costs cold reads; do not keep the app unready over it
+            logger.warning(f"Buffer prewarm failed - {str(e)}")
+            self.prewarmed["error"] = str(e)
+        finally:
+            self.prewarm_done = True
+
+    # ------------------------- Probes -------------------------
+    async def _timed_probe(self, name: str, awaitable, limit_ms: float) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            await awaitable
+        except Exception as e:
+            logger.warning(f"Readiness probe {name} failed - {str(e)}")
+            return {"ok": False, "error": str(e)}
+        latency_ms = (time.perf_counter() - started) * 1000
+        return {"ok": latency_ms <= limit_ms, "latency_ms": round(latency_ms, 1), "limit_ms": limit_ms}
+
+    async def _ping_db(self, db_engine) -> None:
+        async with db_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    async def _probe(self) -> Dict[str, Any]:
+        async with self._probe_lock:
+            probed_at, checks = self._last_probe
+            if checks and time.monotonic() - probed_at < self.probe_interval:
+                return checks
+            probes = {
+                "database": self._timed_probe("database", self._ping_db(engine), self.db_latency_ms),
+                "embeddings": self._timed_probe("embeddings", self.embedding_service.aembed_query("ping"), self.embedding_latency_ms),
+            }
+            if READ_REPLICA:
+                probes["read_database"] = self._timed_probe("read_database", self._ping_db(read_engine), self.db_latency_ms)
+            checks = dict(zip(probes, await asyncio.gather(*probes.values())))
+            self._last_probe = (time.monotonic(), checks)
+            return checks
+
+    async def check(self) -> Tuple[bool, Dict[str, Any]]:
+        if not self.prewarm_done:
+            return False, {"prewarm": {"ok": False, "status": "running"}}
+        checks = {"prewarm": {"ok": True, "relations": self.prewarmed}, **await self._probe()}
+        return all(check["ok"] for check in checks.values()), checks
@@ -1,26 +1,58 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
-from agents.agentic_rag_service import AgenticRAGService
+from helpers.config import settings
+from helpers.db_connection import engine
+from helpers.pool_metrics import pool_metrics
+from helpers.project_cache import project_cache
+from helpers.readiness import ReadinessProbe
 from middlewares.auth_middleware import AuthMiddleware
 from routes import  documents_router, projects_router, query_router, auth_router
+from routes.exceptions import NotPermitted
+from helpers.deps import get_current_user
+from helpers.handle_exceptions import handle_exceptions
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # --- Startup ---
     print("🚀 App is starting up! Initializing resources...")
 
+    # Imported here so `import main` (tooling, CLI, tests) does not load the agent stack
+    from agents.agentic_rag_service import AgenticRAGService
+
     services = await AgenticRAGService.create()
     app.state.supervisor_agent = services.get_service("supervisor_agent")
     app.state.embedding_service = services.get_service("embedding_service")
+    app.state.fast_router = services.get_service("fast_router")
+    app.state.conversation_memory = services.get_service("conversation_memory")
     app.state.vector_store = services.get_service("vector_store")
+    app.state.rag_retriever = services.get_service("rag_retriever")
+    app.state.startup_timings = services.timings
+
+    # /ready stays 503 until the buffer prewarm has finished
+    app.state.readiness = ReadinessProbe(
+        app.state.embedding_service,
+        prewarm_relations=settings.PREWARM_RELATIONS + [settings.VECTOR_TABLE] if settings.PREWARM_ENABLED else [],
+        db_latency_ms=settings.READY_DB_LATENCY_MS,
+        embedding_latency_ms=settings.READY_EMBEDDING_LATENCY_MS,
+        probe_interval=settings.READY_PROBE_INTERVAL_SECONDS
+    )
+    app.state.readiness.start_prewarm()
+
+    # Other workers' project renames / deletes and document writes arrive as NOTIFYs (sent on the primary)
+    if settings.PROJECT_CACHE_LISTEN:
+        if settings.ANSWER_CACHE_ENABLED:
+            from agents.answer_cache import answer_cache
+            answer_cache.listen_on(project_cache)
+        project_cache.start_listener(engine.url.set(drivername="postgresql").render_as_string(hide_password=False))
 
     print("✅ Resources initialized successfully.")
 
     yield
 
     # --- Shutdown ---
+    await project_cache.stop_listener()
 
     print("👋 App shutdown complete. Goodbye!")
 
@@ -52,4 +84,31 @@ async def health_check():
     return JSONResponse(
         status_code=200,
         content={"status": "ok", "message": "App is running smoothly!"}
-    )
\ No newline at end of file
+    )
+
+
+# --- Readiness Endpoint ---
+@app.get("/ready")
+async def readiness_check():
+    readiness = getattr(app.state, "readiness", None)
+    if readiness is None:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+
+    ready, checks = await readiness.check()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "checks": checks,
+            "startup_seconds": {phase: round(seconds, 2) for phase, seconds in app.state.startup_timings.items()},
+        }
+    )
+
+
+# --- DB Pool Metrics Endpoint (admins only) ---
+@app.get("/metrics/db")
+@handle_exceptions
+async def db_pool_metrics(current_user = Depends(get_current_user)):
+    if current_user["role"] != 0:
+        raise NotPermitted()
+    return {"data": pool_metrics.snapshot(), "message": "DB pool metrics"}
@@ -32,12 +32,10 @@ class AuthModel:
         new_user = User(username=username, hashed_password=hash_password(password))
         db.add(new_user)
         try:
-            await db.commit()
-            await db.refresh(new_user)
+            await db.flush()
             logger.info(f"User created successfully: {username}")
             return new_user
         except SQLAlchemyError as e:
-            await db.rollback()
             logger.exception(f"DB error creating user {username}: {e}")
             raise DatabaseError(str(e))
 
@@ -45,10 +43,9 @@ class AuthModel:
         logger.info(f"Removing tokens for user {user_id}")
         try:
             await db.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id))
-            await db.commit()
+            await db.flush()
             logger.info(f"Tokens removed for user {user_id}")
         except SQLAlchemyError as e:
-            await db.rollback()
             logger.exception(f"DB error removing token for user {user_id}: {e}")
             raise DatabaseError(str(e))
 
@@ -62,10 +59,9 @@ class AuthModel:
             )
         )
         try:
-            await db.commit()
+            await db.flush()
             logger.info(f"Refresh token stored for user {user_id}")
         except SQLAlchemyError as e:
-            await db.rollback()
             logger.exception(f"DB error storing refresh token for user {user_id}: {e}")
             raise DatabaseError(str(e))
 
@@ -88,12 +84,10 @@ class AuthModel:
         relation = ProjectUser(project_id=project_id, user_id=user_id)
         db.add(relation)
         try:
-            await db.commit()
-            await db.refresh(relation)
+            await db.flush()
             logger.info(f"Project-user relation created successfully: user={user_id}, project={project_id}")
             return relation
         except SQLAlchemyError as e:
-            await db.rollback()
             logger.exception(f"DB error creating project-user relation: user={user_id}, project={project_id}: {e}")
             raise DatabaseError(str(e))
 
@@ -103,10 +97,9 @@ class AuthModel:
             await db.execute(
                 delete(ProjectUser).where(ProjectUser.user_id == user_id).where(ProjectUser.project_id == project_id)
             )
-            await db.commit()
+            await db.flush()
             logger.info(f"User {user_id} deauthorized from project {project_id}")
         except SQLAlchemyError as e:
-            await db.rollback()
             logger.exception(f"DB error deauthorizing user {user_id} from project {project_id}: {e}")
             raise DatabaseError(str(e))
 
@@ -114,9 +107,8 @@ class AuthModel:
         logger.info(f"Updating role for user {user_id} to {new_role}")
         try:
             await db.execute(update(User).where(User.id == user_id).values(role=new_role))
-            await db.commit()
+            await db.flush()
             logger.info(f"User {user_id} role updated successfully to {new_role}")
         except SQLAlchemyError as e:
-            await db.rollback()
             logger.exception(f"DB error updating role for user {user_id}: {e}")
             raise DatabaseError(str(e))
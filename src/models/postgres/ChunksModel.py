@@ -18,7 +18,7 @@ class ChunksModel(BaseModel):
 
     async def insert_chunks(self, db, chunks_list: List[ChunkInsert], batch_size: int = 100) -> List[Chunk]:
         """
-        Insert chunks in batches using the provided db session.
+        Insert chunks in batches using the provided db session; the caller commits.
         Logs each attempt, success, and failure.
         """
         inserted_chunks = []
@@ -37,13 +37,10 @@ class ChunksModel(BaseModel):
             logger.info(f"Attempting to insert batch {i // batch_size + 1} with {len(batch)} chunks...")
             db.add_all(db_objects)
             try:
-                await db.commit()
-                for obj in db_objects:
-                    await db.refresh(obj)
+                await db.flush()
                 inserted_chunks.extend(db_objects)
                 logger.info(f"Successfully inserted batch {i // batch_size + 1}")
             except IntegrityError as e:
-                await db.rollback()
                 logger.error(f"Failed to insert batch {i // batch_size + 1}: {e}")
                 raise ValueError(f"Failed to insert chunk batch: {e}")
 
@@ -72,7 +69,6 @@ class ChunksModel(BaseModel):
         logger.info(f"Attempting to delete chunks for document_id={document_id}...")
         stmt = delete(Chunk).where(Chunk.document_id == document_id)
         result = await db.execute(stmt)
-        await db.commit()
         deleted = (result.rowcount or 0) > 0
         if deleted:
             logger.info(f"Deleted {result.rowcount} chunk(s) for document_id={document_id}")
@@ -2,9 +2,8 @@ from typing import Dict, Optional, List, Any
 from uuid import UUID
 import logging
 
-from sqlalchemy import select, delete, func, and_, update
+from sqlalchemy import select, delete, and_, update
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.sql.elements import ClauseElement
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.postgres.operations_schema import (
@@ -15,6 +14,7 @@ from models.postgres.operations_schema import (
     DocumentInsertBulk,
 )
 from models.postgres.tables_schema.tables import Document
+from models.postgres.pagination import count_cache, keyset_page
 
 logger = logging.getLogger("DocumentsModel")
 
@@ -32,12 +32,11 @@ class DocumentsModel:
         )
         db.add(new_doc)
         try:
-            await db.commit()
-            await db.refresh(new_doc)
+            # The caller's unit of work commits; server defaults come back via RETURNING
+            await db.flush()
             logger.info(f"[INSERT] Success: Document '{doc_data.filename}' inserted")
             return DocumentOut.model_validate(new_doc)
         except IntegrityError as e:
-            await db.rollback()
             logger.error(f"[INSERT] Failed: {e}")
             raise ValueError(f"Document '{doc_data.filename}' already exists for project '{doc_data.project_id}'.")
 
@@ -56,13 +55,11 @@ class DocumentsModel:
 
             db.add_all(db_objects)
             try:
-                await db.commit()
-                for doc in db_objects:
-                    await db.refresh(doc)
+                # One multi-row INSERT ... RETURNING per batch; committed by the caller
+                await db.flush()
                 inserted_docs.extend(db_objects)
                 logger.info(f"[BULK INSERT] Inserted batch of {len(db_objects)} documents")
             except IntegrityError as e:
-                await db.rollback()
                 logger.error(f"[BULK INSERT] Failed batch: {e}")
                 raise ValueError("Some documents already exist for this project.")
 
@@ -77,7 +74,6 @@ class DocumentsModel:
             .returning(Document)
         )
         result = await db.execute(stmt)
-        await db.commit()
         deleted_doc = result.scalar_one_or_none()
         if deleted_doc:
             logger.info(f"[DELETE] Success: '{doc_data.filename}' deleted")
@@ -87,29 +83,37 @@ class DocumentsModel:
             return None
 
     # ------------------------- List Documents -------------------------
-    async def list_documents(self, db: AsyncSession, project_id: UUID, offset: int = 0, limit: int = 10) -> Dict[str, Any]:
-        return await self._list_documents(db, [Document.project_id == project_id], offset, limit)
-
-    async def list_processed_documents(self, db: AsyncSession, project_id: UUID, offset: int = 0, limit: int = 10) -> Dict[str, Any]:
-        return await self._list_documents(db, [Document.project_id == project_id, Document.is_processed == True], offset, limit)
-
-    async def list_unprocessed_documents(self, db: AsyncSession, project_id: UUID, offset: int = 0, limit: int = 10) -> Dict[str, Any]:
-        return await self._list_documents(db, [Document.project_id == project_id, Document.is_processed == False], offset, limit)
-
-    async def list_flushed_documents(self, db: AsyncSession, project_id: UUID, offset: int = 0, limit: int = 10) -> Dict[str, Any]:
-        return await self._list_documents(db, [Document.project_id == project_id, Document.is_flushed == True], offset, limit)
-
-    async def list_unflushed_documents(self, db: AsyncSession, project_id: UUID, offset: int = 0, limit: int = 10) -> Dict[str, Any]:
-        return await self._list_documents(db, [Document.project_id == project_id, Document.is_flushed == False], offset, limit)
-
-    async def _list_documents(self, db: AsyncSession, filters: Optional[List[ClauseElement]] = None, offset: int = 0, limit: int = 10) -> Dict[str, Any]:
-        stmt = select(Document, func.count().over().label("total_count")).where(*filters).offset(offset).limit(limit)
-        result = await db.execute(stmt)
-        rows = result.all()
-        total_count = rows[0].total_count if rows else 0
-        items = [DocumentOut.model_validate(doc) for doc, _ in rows]
-        logger.info(f"[LIST] Retrieved {len(items)} documents (offset={offset}, limit={limit})")
-        return {"total": total_count, "offset": offset, "limit": limit, "items": items}
+    # Each filter has a (project_id, [flag,] created_at, id) index backing its keyset pages
+    LIST_FILTERS = {
+        "all": [],
+        "processed": [Document.is_processed == True],
+        "unprocessed": [Document.is_processed == False],
+        "flushed": [Document.is_flushed == True],
+        "unflushed": [Document.is_flushed == False],
+    }
+
+    async def list_documents(self, db: AsyncSession, project_id: UUID, offset: int = 0, limit: int = 10, cursor: Optional[str] = None, include_total: bool = True) -> Dict[str, Any]:
+        return await self._list_documents(db, project_id, "all", offset, limit, cursor, include_total)
+
+    async def list_processed_documents(self, db: AsyncSession, project_id: UUID, offset: int = 0, limit: int = 10, cursor: Optional[str] = None, include_total: bool = True) -> Dict[str, Any]:
+        return await self._list_documents(db, project_id, "processed", offset, limit, cursor, include_total)
+
+    async def list_unprocessed_documents(self, db: AsyncSession, project_id: UUID, offset: int = 0, limit: int = 10, cursor: Optional[str] = None, include_total: bool = True) -> Dict[str, Any]:
+        return await self._list_documents(db, project_id, "unprocessed", offset, limit, cursor, include_total)
+
+    async def list_flushed_documents(self, db: AsyncSession, project_id: UUID, offset: int = 0, limit: int = 10, cursor: Optional[str] = None, include_total: bool = True) -> Dict[str, Any]:
+        return await self._list_documents(db, project_id, "flushed", offset, limit, cursor, include_total)
+
+    async def list_unflushed_documents(self, db: AsyncSession, project_id: UUID, offset: int = 0, limit: int = 10, cursor: Optional[str] = None, include_total: bool = True) -> Dict[str, Any]:
+        return await self._list_documents(db, project_id, "unflushed", offset, limit, cursor, include_total)
+
+    async def _list_documents(self, db: AsyncSession, project_id: UUID, filter_name: str, offset: int = 0, limit: int = 10, cursor: Optional[str] = None, include_total: bool = True) -> Dict[str, Any]:
+        filters = [Document.project_id == project_id, *self.LIST_FILTERS[filter_name]]
+        docs, next_cursor = await keyset_page(db, Document, filters, limit, cursor=cursor, offset=offset)
+        items = [DocumentOut.model_validate(doc) for doc in docs]
+        total = await count_cache.count(db, ("documents", project_id, filter_name), Document, filters) if include_total else None
+        logger.info(f"[LIST] Retrieved {len(items)} documents (filter={filter_name}, cursor={cursor is not None}, offset={offset}, limit={limit})")
+        return {"total": total, "offset": offset, "limit": limit, "next_cursor": next_cursor, "items": items}
 
     # ------------------------- Search Document -------------------------
     async def search_document(self, db: AsyncSession, doc_data: DocumentSearch) -> Optional[DocumentOut]:
@@ -122,7 +126,6 @@ class DocumentsModel:
     async def update_document(self, db: AsyncSession, document_id: int) -> Optional[DocumentOut]:
         stmt = update(Document).where(Document.id == document_id).values(is_processed=True).returning(Document)
         result = await db.execute(stmt)
-        await db.commit()
         document = result.scalar_one_or_none()
         return DocumentOut.model_validate(document) if document else None
 
@@ -130,6 +133,5 @@ class DocumentsModel:
     async def flush_document(self, db: AsyncSession, document_id: int) -> Optional[DocumentOut]:
         stmt = update(Document).where(Document.id == document_id).values(is_flushed=True).returning(Document)
         result = await db.execute(stmt)
-        await db.commit()
         document = result.scalar_one_or_none()
         return DocumentOut.model_validate(document) if document else None
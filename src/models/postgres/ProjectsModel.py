@@ -1,9 +1,12 @@
-from sqlalchemy import select, update, delete, func
+from sqlalchemy import select, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from models.postgres.tables_schema.tables import Project
 from models.postgres.operations_schema.projects import ProjectInsert, ProjectUpdate, ProjectDelete, ProjectList, ProjectSearch, ProjectOut
 from routes.exceptions import DatabaseError, ProjectNotFound
+from helpers.db_connection import is_primary
+from helpers.project_cache import project_cache
+from models.postgres.pagination import count_cache, keyset_page
 from helpers.logger import get_logger
 
 logger = get_logger("ProjectModel")
@@ -15,34 +18,34 @@ class ProjectModel:
         new_project = Project(name=data.name, description=data.description)
         db.add(new_project)
         try:
-            await db.commit()
-            await db.refresh(new_project)
+            await db.flush()
             logger.info(f"Project '{data.name}' inserted successfully")
             return ProjectOut.model_validate(new_project)
         except IntegrityError as e:
-            await db.rollback()
             logger.warning(f"Project insert failed, already exists: {data.name}")
             raise DatabaseError(f"Project '{data.name}' already exists")
         except Exception as e:
-            await db.rollback()
             logger.exception(f"Unexpected error inserting project '{data.name}': {e}")
             raise DatabaseError(str(e))
 
     async def list_projects(self, db: AsyncSession, data: ProjectList) -> dict:
-        logger.info(f"Listing projects with offset={data.offset}, limit={data.limit}")
+        logger.info(f"Listing projects with cursor={data.cursor is not None}, offset={data.offset}, limit={data.limit}")
         try:
-            stmt = select(Project, func.count(Project.id).over().label("total_count")).offset(data.offset).limit(data.limit)
-            result = await db.execute(stmt)
-            rows = result.all()
-            items = [ProjectOut.model_validate(row.Project) for row in rows]
-            total_count = rows[0].total_count if rows else 0
+            projects, next_cursor = await keyset_page(db, Project, [], data.limit, cursor=data.cursor, offset=data.offset)
+            items = [ProjectOut.model_validate(project) for project in projects]
+            total = await count_cache.count(db, ("projects",), Project, []) if data.include_total else None
             logger.info(f"Retrieved {len(items)} projects")
-            return {"total": total_count, "offset": data.offset, "limit": data.limit, "items": items}
+            return {"total": total, "offset": data.offset, "limit": data.limit, "next_cursor": next_cursor, "items": items}
+        except ValueError:
+            raise
         except Exception as e:
             logger.exception(f"Failed to list projects: {e}")
             raise DatabaseError(str(e))
 
     async def search_by_name(self, db: AsyncSession, data: ProjectSearch) -> ProjectOut | None:
+        cached = project_cache.get(data.name)
+        if cached is not None:
+            return cached
         logger.info(f"Searching project by name '{data.name}'")
         try:
             stmt = select(Project).where(Project.name == data.name)
@@ -50,7 +53,11 @@ class ProjectModel:
             project = result.scalar_one_or_none()
             if project:
                 logger.info(f"Project '{data.name}' found")
-                return ProjectOut.model_validate(project)
+                project_out = ProjectOut.model_validate(project)
+                # A lagging replica could re-cache a project that was just renamed or deleted
+                if is_primary(db):
+                    project_cache.set(data.name, project_out)
+                return project_out
             else:
                 logger.warning(f"Project '{data.name}' not found")
                 return None
@@ -69,7 +76,7 @@ class ProjectModel:
         try:
             stmt = update(Project).where(Project.name == data.old_name).values(**update_values).returning(Project)
             result = await db.execute(stmt)
-            await db.commit()
+            await project_cache.notify(db, data.old_name)
             updated_project = result.scalar_one_or_none()
             if updated_project:
                 logger.info(f"Project '{data.old_name}' updated successfully")
@@ -78,7 +85,6 @@ class ProjectModel:
                 logger.warning(f"Project '{data.old_name}' not found for update")
                 return None
         except Exception as e:
-            await db.rollback()
             logger.exception(f"Failed to update project '{data.old_name}': {e}")
             raise DatabaseError(str(e))
 
@@ -87,7 +93,7 @@ class ProjectModel:
         try:
             stmt = delete(Project).where(Project.name == data.name).returning(Project)
             result = await db.execute(stmt)
-            await db.commit()
+            await project_cache.notify(db, data.name)
             deleted_project = result.scalar_one_or_none()
             if deleted_project:
                 logger.info(f"Project '{data.name}' deleted successfully")
@@ -96,6 +102,5 @@ class ProjectModel:
                 logger.warning(f"Project '{data.name}' not found for deletion")
                 raise ProjectNotFound(f"Project '{data.name}' not found")   
         except Exception as e:
-            await db.rollback()
             logger.exception(f"Failed to delete project '{data.name}': {e}")
             raise 
@@ -1,67 +1,148 @@
-from typing import Dict, List
+from typing import List, Optional
 import uuid
 import logging
-from sqlalchemy import select
+from sqlalchemy import func, literal, select
 from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .BaseModel import BaseModel
-from models.postgres.tables_schema.tables import UserHistory
+from models.postgres.tables_schema.tables import ConversationTurn, ConversationSummary
+from models.postgres.operations_schema.history import ConversationTurnOut, ConversationSummaryOut
 from routes.exceptions import DatabaseError
 
 logger = logging.getLogger("UserHistoryModel")
 
 class UserHistoryModel(BaseModel):
     """
-    Provides access to user history per project.
+    Provides access to user history per project, stored as append-only
+    conversation turns plus a rolling summary of older turns.
     """
 
     def __init__(self):
         super().__init__()
 
     # ------------------------- Get History -------------------------
-    async def get_history(self, db: AsyncSession, user_id: uuid.UUID, project_id: uuid.UUID) -> List[Dict]:
+    async def get_history(self, db: AsyncSession, user_id: uuid.UUID, project_id: uuid.UUID, limit: int = 10) -> List[ConversationTurnOut]:
         """
-        Retrieve the chat history for a given user and project.
+        Retrieve the last `limit` turns for a given user and project, oldest first.
         """
         try:
-            logger.info(f"Attempting to fetch history [user={user_id}, project={project_id}]")
-            stmt = select(UserHistory.history).where(
-                UserHistory.user_id == user_id,
-                UserHistory.project_id == project_id
+            logger.info(f"Attempting to fetch last {limit} turns [user={user_id}, project={project_id}]")
+            stmt = (
+                select(ConversationTurn)
+                .where(ConversationTurn.user_id == user_id, ConversationTurn.project_id == project_id)
+                .order_by(ConversationTurn.seq.desc())
+                .limit(limit)
             )
             result = await db.execute(stmt)
-            history = result.scalar_one_or_none()
-            logger.info(f"Successfully fetched history [user={user_id}, project={project_id}]")
-            return history or []
+            turns = [ConversationTurnOut.model_validate(t) for t in result.scalars().all()]
+            logger.info(f"Successfully fetched {len(turns)} turns [user={user_id}, project={project_id}]")
+            return turns[::-1]
 
         except Exception as e:
             logger.error(f"Failed to fetch history [user={user_id}, project={project_id}] - {str(e)}")
             raise DatabaseError(f"Failed to fetch history: {str(e)}") from e
 
-    # ------------------------- Update / Upsert History -------------------------
-    async def update_history(self, db: AsyncSession, user_id: uuid.UUID, project_id: uuid.UUID, history: List[Dict]):
+    async def get_turns_range(self, db: AsyncSession, user_id: uuid.UUID, project_id: uuid.UUID, after_seq: int, upto_seq: int) -> List[ConversationTurnOut]:
         """
-        Upsert the chat history for a given user and project.
+        Retrieve turns with after_seq < seq <= upto_seq, oldest first.
         """
         try:
-            logger.info(f"Attempting to update history [user={user_id}, project={project_id}]")
-            stmt = insert(UserHistory).values(
+            stmt = (
+                select(ConversationTurn)
+                .where(
+                    ConversationTurn.user_id == user_id,
+                    ConversationTurn.project_id == project_id,
+                    ConversationTurn.seq > after_seq,
+                    ConversationTurn.seq <= upto_seq,
+                )
+                .order_by(ConversationTurn.seq)
+            )
+            result = await db.execute(stmt)
+            return [ConversationTurnOut.model_validate(t) for t in result.scalars().all()]
+
+        except Exception as e:
+            logger.error(f"Failed to fetch turns {after_seq}..{upto_seq} [user={user_id}, project={project_id}] - {str(e)}")
+            raise DatabaseError(f"Failed to fetch history: {str(e)}") from e
+
+    # ------------------------- Append Turn -------------------------
+    async def append_turn(self, db: AsyncSession, user_id: uuid.UUID, project_id: uuid.UUID, question: str, answer: str, retries: int = 3) -> ConversationTurnOut:
+        """
+        Append one turn with a single INSERT ... SELECT that assigns the next seq.
+        A concurrent append taking the same seq violates the unique key and is
+        retried; each attempt runs in a savepoint so the caller's transaction
+        survives the conflict.
+        """
+        next_seq = (
+            select(func.coalesce(func.max(ConversationTurn.seq), 0) + 1)
+            .where(ConversationTurn.user_id == user_id, ConversationTurn.project_id == project_id)
+            .scalar_subquery()
+        )
+        stmt = insert(ConversationTurn).from_select(
+            ["id", "user_id", "project_id", "seq", "question", "answer"],
+            select(
+                literal(uuid.uuid4()), literal(user_id), literal(project_id),
+                next_seq, literal(question), literal(answer)
+            ),
+        ).returning(ConversationTurn)
+
+        for attempt in range(1, retries + 1):
+            try:
+                logger.info(f"Attempting to append turn [user={user_id}, project={project_id}]")
+                async with db.begin_nested():
+                    result = await db.execute(stmt)
+                    turn = ConversationTurnOut.model_validate(result.scalar_one())
+                logger.info(f"Successfully appended turn {turn.seq} [user={user_id}, project={project_id}]")
+                return turn
+
+            except IntegrityError as e:
+                if attempt == retries:
+                    logger.error(f"Failed to append turn after {retries} attempts [user={user_id}, project={project_id}] - {str(e)}")
+                    raise DatabaseError(f"Failed to append turn: {str(e)}") from e
+                logger.warning(f"Concurrent append, retrying [user={user_id}, project={project_id}]")
+
+            except Exception as e:
+                logger.error(f"Failed to append turn [user={user_id}, project={project_id}] - {str(e)}")
+                raise DatabaseError(f"Failed to append turn: {str(e)}") from e
+
+    # ------------------------- Summary -------------------------
+    async def get_summary(self, db: AsyncSession, user_id: uuid.UUID, project_id: uuid.UUID) -> Optional[ConversationSummaryOut]:
+        try:
+            stmt = select(ConversationSummary).where(
+                ConversationSummary.user_id == user_id,
+                ConversationSummary.project_id == project_id
+            )
+            result = await db.execute(stmt)
+            summary = result.scalar_one_or_none()
+            return ConversationSummaryOut.model_validate(summary) if summary else None
+
+        except Exception as e:
+            logger.error(f"Failed to fetch summary [user={user_id}, project={project_id}] - {str(e)}")
+            raise DatabaseError(f"Failed to fetch summary: {str(e)}") from e
+
+    async def upsert_summary(self, db: AsyncSession, user_id: uuid.UUID, project_id: uuid.UUID, summary: str, last_seq: int) -> ConversationSummaryOut:
+        """
+        Replace the rolling summary; a summary covering fewer turns never overwrites a newer one.
+        """
+        try:
+            logger.info(f"Attempting to update summary up to turn {last_seq} [user={user_id}, project={project_id}]")
+            stmt = insert(ConversationSummary).values(
                 user_id=user_id,
                 project_id=project_id,
-                history=history
+                summary=summary,
+                last_seq=last_seq
             ).on_conflict_do_update(
                 index_elements=['user_id', 'project_id'],
-                set_={'history': history}
-            ).returning(UserHistory)
+                set_={'summary': summary, 'last_seq': last_seq, 'updated_at': func.now()},
+                where=ConversationSummary.last_seq < last_seq
+            ).returning(ConversationSummary)
 
             result = await db.execute(stmt)
-            await db.commit()
-            updated_record = result.scalar_one_or_none()
-            logger.info(f"Successfully updated history [user={user_id}, project={project_id}]")
-            return updated_record
+            record = result.scalar_one_or_none()
+            logger.info(f"Successfully updated summary [user={user_id}, project={project_id}]")
+            return ConversationSummaryOut.model_validate(record) if record else None
 
         except Exception as e:
-            await db.rollback()
-            logger.error(f"Failed to update history [user={user_id}, project={project_id}] - {str(e)}")
-            raise DatabaseError(f"Failed to update history: {str(e)}") from e
+            logger.error(f"Failed to update summary [user={user_id}, project={project_id}] - {str(e)}")
+            raise DatabaseError(f"Failed to update summary: {str(e)}") from e
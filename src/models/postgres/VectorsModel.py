@@ -1,14 +1,15 @@
 # src/models/vector_model.py
 import logging
-from typing import List
+from typing import Dict, List, Optional
 from uuid import UUID
 
-from sqlalchemy import Float, insert, select, delete
+from sqlalchemy import Float, Integer, Table, cast, column, insert, select, delete, true, values
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql.elements import ClauseElement
 
 from .BaseModel import BaseModel
 from models.postgres.tables_schema.tables import VectorEmbedding, Chunk
-from models.postgres.operations_schema import VectorInsertItems, VectorOut
+from models.postgres.operations_schema import VectorInsertItems, VectorOut, VectorCandidateOut
 
 logger = logging.getLogger("VectorModel")
 
@@ -55,12 +56,10 @@ class VectorModel(BaseModel):
             try:
                 logger.info(f"Attempting to insert vector batch for document {data.document_id} [{i}-{i + len(batch_vectors)}]")
                 result = await db.execute(stmt)
-                await db.commit()
                 batch_ids = [row.id for row in result.fetchall()]
                 inserted_rows.extend(batch_ids)
                 logger.info(f"Successfully inserted {len(batch_ids)} vectors for document {data.document_id}")
             except IntegrityError as e:
-                await db.rollback()
                 logger.error(f"Failed to insert vector batch for document {data.document_id}: {e}")
                 raise ValueError("Failed to insert vectors batch") from e
 
@@ -74,16 +73,40 @@ class VectorModel(BaseModel):
         try:
             logger.info(f"Attempting to delete vectors for document {document_id}")
             stmt = delete(VectorEmbedding).where(VectorEmbedding.document_id == document_id)
-            result = await db.execute(stmt)
-            await db.commit()
+            # Savepoint: a failure here must not abort the caller's transaction
+            async with db.begin_nested():
+                result = await db.execute(stmt)
             deleted_count = result.rowcount or 0
             logger.info(f"Deleted {deleted_count} vectors for document {document_id}")
             return True
         except Exception as e:
-            await db.rollback()
             logger.error(f"Failed to delete vectors for document {document_id}: {e}")
             return False
 
+    # -------------------------------------------------------------------------
+    # ✅ Delete a document's rows from the vector store table
+    # -------------------------------------------------------------------------
+    async def delete_store_vectors_by_document_id(
+        self,
+        db,
+        store_table: Table,
+        document_id: UUID,
+        keep_ids: Optional[List[str]] = None,
+    ) -> int:
+        """
+        Delete the PGVectorStore rows of a document, except keep_ids (the rows
+        just written by a re-process). Runs in the caller's transaction and
+        raises on failure, so it commits or rolls back with the document rows.
+        """
+        logger.info(f"Deleting stale vectors of document {document_id} from {store_table.name}")
+        stmt = delete(store_table).where(store_table.c.document_id == document_id)
+        if keep_ids:
+            stmt = stmt.where(store_table.c.langchain_id.not_in([UUID(str(i)) for i in keep_ids]))
+        result = await db.execute(stmt)
+        deleted_count = result.rowcount or 0
+        logger.info(f"Deleted {deleted_count} stale vectors of document {document_id}")
+        return deleted_count
+
     # -------------------------------------------------------------------------
     # ✅ Retrieve top-k similar chunks (with text + distance)
     # -------------------------------------------------------------------------
@@ -117,3 +140,116 @@ class VectorModel(BaseModel):
         except Exception as e:
             logger.error(f"Failed to retrieve top-k vectors for project {project_id}: {e}")
             return []
+
+    # -------------------------------------------------------------------------
+    # ✅ Retrieve top-k chunks from the vector store table (optionally with embeddings)
+    # -------------------------------------------------------------------------
+    async def similarity_candidates(
+        self,
+        db,
+        store_table: Table,
+        query_vector: List[float],
+        fetch_k: int,
+        with_embeddings: bool = False,
+        filters: Optional[List[ClauseElement]] = None,
+    ) -> list[VectorCandidateOut]:
+        """
+        Return the fetch_k nearest chunks of the PGVectorStore table in a single
+        query; with_embeddings also returns their vectors for client-side re-ranking.
+        Filters (e.g. project_id) are applied in the same query's WHERE clause.
+        """
+        try:
+            logger.info(f"Querying {fetch_k} candidate vectors from {store_table.name}")
+            distance_expr = store_table.c.embedding.cosine_distance(query_vector).label("distance")
+
+            columns = [
+                store_table.c.langchain_id,
+                store_table.c.content,
+                store_table.c.langchain_metadata,
+                distance_expr,
+            ]
+            if with_embeddings:
+                columns.append(store_table.c.embedding)
+
+            stmt = select(*columns).where(*(filters or [])).order_by(distance_expr).limit(fetch_k)
+
+            result = await db.execute(stmt)
+            rows = result.fetchall()
+            logger.info(f"Retrieved {len(rows)} candidate vectors from {store_table.name}")
+            return [
+                VectorCandidateOut(
+                    id=row.langchain_id,
+                    text=row.content,
+                    metadata=row.langchain_metadata or {},
+                    embedding=row.embedding.tolist() if with_embeddings else None,
+                    distance=row.distance,
+                )
+                for row in rows
+            ]
+        except Exception as e:
+            logger.error(f"Failed to retrieve candidate vectors from {store_table.name}: {e}")
+            return []
+
+    # -------------------------------------------------------------------------
+    # ✅ Retrieve top-k chunks for many query vectors in one round trip
+    # -------------------------------------------------------------------------
+    async def similarity_candidates_batch(
+        self,
+        db,
+        store_table: Table,
+        query_vectors: List[List[float]],
+        k: int,
+        filters: Optional[List[ClauseElement]] = None,
+    ) -> Dict[int, list[VectorCandidateOut]]:
+        """
+        Return the k nearest chunks for every query vector, keyed by the
+        vector's position. The vectors are sent as one VALUES list and each is
+        matched by a LATERAL top-k subquery, so the whole batch costs a single
+        statement (each subquery can still use the vector index).
+        """
+        try:
+            logger.info(f"Querying top {k} vectors for {len(query_vectors)} queries from {store_table.name}")
+            embedding_type = store_table.c.embedding.type
+            queries = values(
+                column("idx", Integer), column("embedding", embedding_type), name="queries"
+            ).data(list(enumerate(query_vectors)))
+
+            distance_expr = store_table.c.embedding.cosine_distance(
+                cast(queries.c.embedding, embedding_type)
+            ).label("distance")
+            hits = (
+                select(
+                    store_table.c.langchain_id,
+                    store_table.c.content,
+                    store_table.c.langchain_metadata,
+                    distance_expr,
+                )
+                .where(*(filters or []))
+                .order_by(distance_expr)
+                .limit(k)
+                .lateral("hits")
+            )
+            stmt = (
+                select(queries.c.idx, hits)
+                .select_from(queries.join(hits, true()))
+                .order_by(queries.c.idx, hits.c.distance)
+            )
+
+            result = await db.execute(stmt)
+            rows = result.fetchall()
+            logger.info(f"Retrieved {len(rows)} candidate vectors from {store_table.name}")
+
+            candidates: Dict[int, list[VectorCandidateOut]] = {i: [] for i in range(len(query_vectors))}
+            for row in rows:
+                candidates[row.idx].append(
+                    VectorCandidateOut(
+                        id=row.langchain_id,
+                        text=row.content,
+                        metadata=row.langchain_metadata or {},
+                        distance=row.distance,
+                    )
+                )
+            return candidates
+        except Exception as e:
+            logger.warning(f"Failed to retrieve batch candidate vectors from {store_table.name}; questions will search one by one: {e}")
+            return {}
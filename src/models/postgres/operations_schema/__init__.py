@@ -1,4 +1,5 @@
 from .projects import ProjectInsert, ProjectOut, ProjectUpdate, ProjectDelete
 from .documents import DocumentInsert, DocumentOut, DocumentDelete, DocumentSearch, DocumentInsertBulk,DocumentUpdate
 from .chunks import ChunkInsert, ChunkOut
-from .vectors import VectorInsertItems, VectorOut
+from .vectors import VectorInsertItems, VectorOut, VectorCandidateOut
+from .history import ConversationTurnOut, ConversationSummaryOut
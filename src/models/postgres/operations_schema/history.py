@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+
+# ----------------------------
+# Conversation History Schemas
+# ----------------------------
+
+class ConversationTurnOut(BaseModel):
+    seq: int
+    question: str
+    answer: str
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class ConversationSummaryOut(BaseModel):
+    user_id: UUID
+    project_id: UUID
+    summary: str
+    last_seq: int
+
+    model_config = {"from_attributes": True}
@@ -10,8 +10,10 @@ class ProjectInsert(BaseModel):
     model_config = {"from_attributes": True}
 
 class ProjectList(BaseModel):
-    offset: int
+    offset: int = 0
     limit: int
+    cursor: Optional[str] = None
+    include_total: bool = True
 
     model_config = {"from_attributes": True}
 
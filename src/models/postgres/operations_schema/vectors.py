@@ -16,4 +16,9 @@ class VectorOut(BaseModel):
     text: str
     distance: float
 
-
+class VectorCandidateOut(BaseModel):
+    id: UUID
+    text: str
+    metadata: dict
+    embedding: Optional[List[float]] = None
+    distance: float
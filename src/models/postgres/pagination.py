@@ -0,0 +1,92 @@
+import base64
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Hashable, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ClauseElement
+
+from helpers.config import settings
+
+
+# ------------------------- Cursors -------------------------
+def encode_cursor(created_at: datetime, row_id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.split("|")
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+
+
+# ------------------------- Totals -------------------------
+class CountCache:
+    """
+    Exact row counts per listing (table + filter), reused for ttl_seconds so
+    paging through a large listing runs the count once rather than per page.
+    A cached total can lag recent inserts and deletes by up to the TTL.
+    Past max_entries the least recently used listing is evicted.
+    """
+
+    def __init__(self, ttl_seconds: float = 30, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def count(self, db: AsyncSession, key: Hashable, model: Any, filters: List[ClauseElement]) -> int:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        total = await db.scalar(select(func.count()).select_from(model).where(*filters))
+        with self._lock:
+            self._entries[key] = (total, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return total
+
+
+count_cache = CountCache(ttl_seconds=settings.LIST_COUNT_CACHE_TTL_SECONDS)
+
+
+# ------------------------- Pages -------------------------
+async def keyset_page(
+    db: AsyncSession,
+    model: Any,
+    filters: List[ClauseElement],
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    One page of model rows, newest first, ordered by (created_at, id) so pages
+    are stable. With a cursor (the previous page's next_cursor) the page
+    starts right after that row through the (…, created_at, id) index, at the
+    same cost at any depth; offset is only honoured without a cursor.
+    Returns the rows and the cursor of the next page (None on the last page).
+    """
+    stmt = select(model).where(*filters)
+    if cursor:
+        stmt = stmt.where(tuple_(model.created_at, model.id) < tuple_(*decode_cursor(cursor)))
+    elif offset:
+        stmt = stmt.offset(offset)
+    stmt = stmt.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1)
+
+    rows = list((await db.execute(stmt)).scalars().all())
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
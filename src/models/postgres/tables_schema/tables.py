@@ -7,7 +7,7 @@ from sqlalchemy import (
     MetaData, Column, String, Boolean, DateTime, Text, Integer,
     ForeignKey, Index, UniqueConstraint, func, Table, text
 )
-from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.dialects.postgresql import UUID, JSON, JSONB
 from sqlalchemy.orm import declarative_base, relationship, Mapped, mapped_column
 from pgvector.sqlalchemy import Vector
 
@@ -64,6 +64,11 @@ class Project(Base):
     documents = relationship("Document", back_populates="project", cascade="all, delete-orphan")
     users = relationship("ProjectUser", back_populates="project", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Keyset pagination of the project listing
+        Index("idx_projects_created", "created_at", "id"),
+    )
+
 
 # ============================================================
 # PROJECT-USER ASSOCIATION TABLE
@@ -119,6 +124,10 @@ class Document(Base):
         UniqueConstraint("project_id", "filename", name="uq_project_filename"),
         Index("idx_documents_project_filename", "project_id", "filename"),
         Index("idx_documents_is_processed", "is_processed"),
+        # Keyset pagination of document listings, one index per listing filter
+        Index("idx_documents_project_created", "project_id", "created_at", "id"),
+        Index("idx_documents_project_processed_created", "project_id", "is_processed", "created_at", "id"),
+        Index("idx_documents_project_flushed_created", "project_id", "is_flushed", "created_at", "id"),
     )
 
 
@@ -173,6 +182,64 @@ class UserHistory(Base):
     )
 
 
+# ============================================================
+# CONVERSATION TURNS TABLE (append-only history)
+# ============================================================
+class ConversationTurn(Base):
+    """
+    One question/answer turn of a user's conversation in a project. Turns are
+    only ever inserted; seq orders them per (user, project).
+    """
+    __tablename__ = "conversation_turns"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    project_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
+    )
+    seq: Mapped[int] = mapped_column(Integer, nullable=False)
+    question: Mapped[str] = mapped_column(Text, nullable=False)
+    answer: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Also serves the "last N turns" lookup (index scan backwards on seq)
+        UniqueConstraint("user_id", "project_id", "seq", name="uq_conversation_turns_user_project_seq"),
+    )
+
+
+# ============================================================
+# CONVERSATION SUMMARIES TABLE
+# ============================================================
+class ConversationSummary(Base):
+    """
+    Rolling summary of the turns that fell out of the loaded history window.
+    """
+    __tablename__ = "conversation_summaries"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    project_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False
+    )
+    summary: Mapped[str] = mapped_column(Text, nullable=False)
+    last_seq: Mapped[int] = mapped_column(Integer, nullable=False)  # last turn folded into the summary
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False
+    )
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "project_id", name="uq_conversation_summaries_user_project"),
+    )
+
+
 # ============================================================
 # REFRESH TOKENS TABLE
 # ============================================================
@@ -227,3 +294,32 @@ class VectorEmbedding(Base):
     project = relationship("Project")
     document = relationship("Document", back_populates="vectors")
     chunk = relationship("Chunk", back_populates="vectors")
+
+
+# ============================================================
+# LANGCHAIN VECTOR STORE TABLE
+# ============================================================
+# Created and written by langchain_postgres' PGEngine (see VectorStoreFactory),
+# so it lives in its own MetaData and is not managed by alembic autogenerate.
+vector_store_metadata = MetaData()
+
+
+def vector_store_table(table_name: str, schema_name: str = "public", vector_size: int = 768) -> Table:
+    """
+    Core table mapping of the PGVectorStore table, for queries the store
+    does not expose (e.g. returning the embeddings themselves).
+    """
+    key = f"{schema_name}.{table_name}"
+    if key in vector_store_metadata.tables:
+        return vector_store_metadata.tables[key]
+    return Table(
+        table_name,
+        vector_store_metadata,
+        Column("langchain_id", UUID(as_uuid=True), primary_key=True),
+        Column("content", Text, nullable=False),
+        Column("embedding", Vector(vector_size), nullable=False),
+        Column("project_id", UUID(as_uuid=True)),
+        Column("document_id", UUID(as_uuid=True)),
+        Column("langchain_metadata", JSON),
+        schema=schema_name,
+    )
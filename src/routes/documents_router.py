@@ -5,7 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from controllers.DocumentsController import DocumentsController
 from helpers.deps import get_current_user
 from helpers.handle_exceptions import handle_exceptions
-from helpers.db_connection import get_db
+from helpers.db_connection import get_db, get_read_db
 from routes.schemes.documents import DocumentFlushRequest, DocumentProcessRequest, DocumentGetRequest, DocumentDelRequest, DocumentSearch
 
 documents_router = APIRouter(prefix="/documents", tags=["Documents"])
@@ -36,12 +36,12 @@ async def delete_documents(data: DocumentDelRequest, db: AsyncSession = Depends(
 
 @documents_router.get("")
 @handle_exceptions
-async def list_documents(data: DocumentGetRequest, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
-    return await doc_controller.get_docs(db, data.project_name, data.filter, data.offset, data.limit)
+async def list_documents(data: DocumentGetRequest, db: AsyncSession = Depends(get_read_db), current_user=Depends(get_current_user)):
+    return await doc_controller.get_docs(db, data.project_name, data.filter, data.offset, data.limit, data.cursor, data.include_total)
 
 @documents_router.post("/search")
 @handle_exceptions
-async def search_documents(data: DocumentSearch, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+async def search_documents(data: DocumentSearch, db: AsyncSession = Depends(get_read_db), current_user=Depends(get_current_user)):
     doc = await doc_controller.get_by_project_id_and_filename(db, data.project_id, data.filename)
     if not doc:
         raise FileNotFoundError(f"Document '{data.filename}' not found")
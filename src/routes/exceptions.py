@@ -21,4 +21,7 @@ class ProjectNotFound(Exception):
     pass
 
 class ProjectExists(Exception):
+    pass
+
+class ClientDisconnected(Exception):
     pass
\ No newline at end of file
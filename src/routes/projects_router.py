@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from helpers.db_connection import get_db
+from helpers.db_connection import get_db, get_read_db
 from controllers.ProjectsController import ProjectsController
 from helpers.deps import get_current_user
 from helpers.handle_exceptions import handle_exceptions
@@ -32,12 +32,12 @@ async def create_project(data: ProjectCreateRequest, db: AsyncSession = Depends(
 
 @projects_router.get("")
 @handle_exceptions
-async def get_all_projects(data: ProjectListRequest, db: AsyncSession = Depends(get_db), current_user = Depends(get_current_user)):
+async def get_all_projects(data: ProjectListRequest, db: AsyncSession = Depends(get_read_db), current_user = Depends(get_current_user)):
     return await project_controller.list_projects(db, data)
 
 @projects_router.get("/search")
 @handle_exceptions
-async def search_by_name(data: ProjectSearchRequest, db: AsyncSession = Depends(get_db), current_user = Depends(get_current_user)):
+async def search_by_name(data: ProjectSearchRequest, db: AsyncSession = Depends(get_read_db), current_user = Depends(get_current_user)):
     return await project_controller.search_by_name(db, data)
 
 @projects_router.put("")
@@ -1,12 +1,17 @@
 from fastapi import APIRouter, Request, Depends
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any
-from helpers.db_connection import get_db
+from controllers.QueryController import QueryController
+from helpers.cancellation import run_until_disconnected
+from helpers.db_connection import get_db, get_read_db
+from helpers.deps import get_current_user
 from helpers.handle_exceptions import handle_exceptions
-from routes.schemes.query import QueryRequest
+from routes.schemes.query import BatchQueryRequest, QueryRequest
 import logging
 
 query_router = APIRouter(prefix="/query")
+query_controller = QueryController()
 
 logger = logging.getLogger("query_router")
 logging.basicConfig(
@@ -19,50 +24,70 @@ logging.basicConfig(
 async def answer_question(
     request: Request,
     data: QueryRequest,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user)
 ) -> Any:
     supervisor_agent = request.app.state.supervisor_agent
+    embedding_service = request.app.state.embedding_service
+    fast_router = request.app.state.fast_router
+    conversation_memory = request.app.state.conversation_memory
 
-    payload = {
-        "messages": [
-            {"role": "system", "content": "You are the user‑facing supervisor agent."},
-            {"role": "user", "content": data.query}
-        ]
-    }
+    return await run_until_disconnected(
+        request,
+        query_controller.answer_question(db, supervisor_agent, fast_router, conversation_memory, embedding_service, data, current_user)
+    )
 
-    # Invoke supervisor
-    result = supervisor_agent.invoke(payload)
 
-    # Extract agent traces
-    agent_traces = getattr(result, "agent_traces", None) or result.get("agent_traces", [])
+@query_router.post("/stream")
+@handle_exceptions
+async def stream_answer(
+    request: Request,
+    data: QueryRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user)
+) -> Any:
+    supervisor_agent = request.app.state.supervisor_agent
+    embedding_service = request.app.state.embedding_service
+    fast_router = request.app.state.fast_router
+    conversation_memory = request.app.state.conversation_memory
+
+    # Project / access errors are raised here, before the stream starts
+    scope = await query_controller.resolve_scope(db, data, current_user)
+    history = await query_controller.load_history(db, conversation_memory, data, scope, current_user)
+    # get_db only exits after the stream ends: hand the connection back now
+    await db.close()
 
-    # Extract final answer (handle both dict and AIMessage formats)
-    final_answer = getattr(result, "content", None) or result.get("final_answer", None)
-    if not final_answer:
-        # fallback if result.messages exists
-        messages = getattr(result, "messages", None) or result.get("messages", [])
-        if messages:
-            final_answer = getattr(messages[-1], "content", None) or messages[-1].get("content")
+    return StreamingResponse(
+        query_controller.stream_answer(
+            supervisor_agent, fast_router, conversation_memory, embedding_service, data, scope, history, current_user
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    # Log minimal info per agent (optional, you already log in Supervisor)
-    for trace in agent_traces:
-        agent_name = trace.get("agent_name")
-        query_part = trace.get("arguments")
-        response = trace.get("response")
-        logger.info(
-            f"[AGENT TRACE] Agent: {agent_name}, "
-            f"Query type: {type(query_part).__name__}, "
-            f"Response type: {type(response).__name__}"
-        )
 
-    # Build list of agents used
-    agents_used = [trace.get("agent_name") for trace in agent_traces]
+@query_router.post("/batch")
+@handle_exceptions
+async def answer_batch(
+    request: Request,
+    data: BatchQueryRequest,
+    db: AsyncSession = Depends(get_read_db),
+    current_user=Depends(get_current_user)
+) -> Any:
+    supervisor_agent = request.app.state.supervisor_agent
+    embedding_service = request.app.state.embedding_service
+    fast_router = request.app.state.fast_router
+    rag_retriever = request.app.state.rag_retriever
+
+    # Project / access errors are raised here, before the stream starts
+    scope = await query_controller.resolve_scope(db, data, current_user)
+    # get_read_db only exits after the stream ends: hand the connection back now
+    await db.close()
 
-    return {
-        "success": True,
-        "message": None,
-        "data": {
-            "final_answer": final_answer,
-            "agents_used": agents_used
-        }
-    }
+    return StreamingResponse(
+        query_controller.answer_batch(
+            supervisor_agent, fast_router, embedding_service, rag_retriever, data, scope
+        ),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"},
+    )
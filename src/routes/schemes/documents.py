@@ -35,8 +35,10 @@ class DocumentFilter(str, Enum):
 
 class DocumentGetRequest(BaseModel):
     project_name: str
-    offset: int
-    limit: int
+    offset: int = Field(0, ge=0)  # ignored when cursor is set
+    limit: int = Field(..., ge=1)
+    cursor: Optional[str] = None  # next_cursor of the previous page
+    include_total: bool = True
     filter: DocumentFilter = DocumentFilter.all
 
     model_config = {"from_attributes": True}
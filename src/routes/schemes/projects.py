@@ -10,8 +10,10 @@ class ProjectCreateRequest(BaseModel):
     model_config = {"from_attributes": True}
 
 class ProjectListRequest(BaseModel):
-    offset: int
-    limit:int
+    offset: int = Field(0, ge=0)  # ignored when cursor is set
+    limit: int = Field(..., ge=1)
+    cursor: Optional[str] = None  # next_cursor of the previous page
+    include_total: bool = True
 
     model_config = {"from_attributes": True}
 
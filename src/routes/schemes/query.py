@@ -1,9 +1,42 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 class QueryRequest(BaseModel):
 
     query: str
+    project_name: Optional[str] = None
 
+    # Optional narrowing of retrieval inside the project
+    file_names: Optional[List[str]] = None
+    metadata_filter: Optional[Dict[str, Any]] = None
 
-    model_config = {"from_attributes": True}
\ No newline at end of file
+    # Continue the caller's conversation in this project (needs project_name)
+    use_history: bool = True
+
+    # Optional maximal-marginal-relevance re-ranking of retrieved chunks
+    mmr: bool = False
+    mmr_lambda: float = Field(0.5, ge=0.0, le=1.0)
+    mmr_fetch_k: int = Field(20, ge=1, le=200)
+
+
+    model_config = {"from_attributes": True}
+
+
+class BatchQueryRequest(BaseModel):
+
+    # Answered independently: no conversation history is read or written
+    questions: List[str] = Field(..., min_length=1, max_length=200)
+    project_name: Optional[str] = None
+
+    file_names: Optional[List[str]] = None
+    metadata_filter: Optional[Dict[str, Any]] = None
+
+    mmr: bool = False
+    mmr_lambda: float = Field(0.5, ge=0.0, le=1.0)
+    mmr_fetch_k: int = Field(20, ge=1, le=200)
+
+    # Agent runs in flight at once
+    concurrency: int = Field(4, ge=1, le=16)
+
+
+    model_config = {"from_attributes": True}
@@ -0,0 +1,25 @@
+import os
+
+# Settings has required fields; unit tests never connect or call a provider
+for key, value in {
+    "MAX_FILE_SIZE_MB": "50",
+    "ALLOWED_MIME_TYPES": '["application/pdf"]',
+    "POSTGRES_USER": "postgres",
+    "POSTGRES_PASSWORD": "postgres",
+    "POSTGRES_DB": "omnirag",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "GROQ_API_KEY": "test",
+    "GROQ_BASE_URL": "http://localhost",
+    "GROQ_MODEL": "test",
+    "TEMPERATURE": "0",
+    "OLLAMA_API_KEY": "test",
+    "OLLAMA_BASE_URL": "http://localhost",
+    "OLLAMA_MODEL": "test",
+    "VECTOR_TABLE": "vector_store",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "15",
+    "REFRESH_TOKEN_EXPIRE_DAYS": "7",
+    "SECRET_KEY": "test",
+    "ALGORITHM": "HS256",
+}.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+import pytest
+
+from agents.http_transport import RateLimiter
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+# ------------------------- Token buckets -------------------------
+def test_acquire_blocks_once_the_request_bucket_is_empty():
+    limiter = RateLimiter("test", requests_per_minute=2)
+
+    async def check():
+        await limiter.aacquire(1)
+        await limiter.aacquire(1)
+        # The next request only refills after ~30s
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(limiter.aacquire(1), timeout=0.1)
+
+    run(check())
+    assert limiter.in_flight == 2
+
+
+def test_token_bucket_counts_estimated_tokens():
+    limiter = RateLimiter("test", tokens_per_minute=1000)
+    assert limiter._try_acquire(900) == 0
+    assert limiter._try_acquire(200) > 0
+    assert limiter._try_acquire(100) == 0
+
+
+def test_blocking_acquire_refuses_the_event_loop_thread():
+    limiter = RateLimiter("test")
+
+    async def check():
+        limiter.acquire(1)
+
+    with pytest.raises(RuntimeError, match="event loop"):
+        run(check())
+
+
+# ------------------------- Adaptive concurrency -------------------------
+def test_concurrency_cap_blocks_extra_requests():
+    limiter = RateLimiter("test", max_concurrency=2)
+    assert limiter._try_acquire(1) == 0
+    assert limiter._try_acquire(1) == 0
+    assert limiter._try_acquire(1) > 0
+    limiter.release(200)
+    assert limiter._try_acquire(1) == 0
+
+
+def test_rate_limit_halves_concurrency_and_success_grows_it_back():
+    limiter = RateLimiter("test", max_concurrency=8, min_concurrency=1)
+
+    limiter.acquire(1)
+    limiter.release(429, retry_after=0.05)
+    assert limiter.concurrency == 4
+    # Retry-After pauses every request to the provider
+    assert limiter._try_acquire(1) > 0
+
+    time.sleep(0.06)
+    history = []
+    for _ in range(40):
+        limiter.acquire(1)
+        limiter.release(200)
+        history.append(limiter.concurrency)
+    assert history == sorted(history)
+    assert 4 < history[0] < 5
+    assert history[-1] == 8
+
+
+def test_rate_limit_never_drops_below_min_concurrency():
+    limiter = RateLimiter("test", max_concurrency=4, min_concurrency=2)
+    for _ in range(5):
+        limiter.in_flight += 1
+        limiter.release(429, retry_after=0.01)
+    assert limiter.concurrency == 2
+
+
+def test_server_errors_leave_concurrency_unchanged():
+    limiter = RateLimiter("test", max_concurrency=8)
+    limiter.acquire(1)
+    limiter.release(429, retry_after=0.01)
+    time.sleep(0.02)
+    limiter.acquire(1)
+    limiter.release(503)
+    limiter.acquire(1)
+    limiter.release(None)
+    assert limiter.concurrency == 4
+    assert limiter.in_flight == 0
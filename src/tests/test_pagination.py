@@ -0,0 +1,130 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import Column, DateTime, String, Uuid
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import declarative_base
+
+from models.postgres.pagination import CountCache, decode_cursor, encode_cursor, keyset_page
+
+Base = declarative_base()
+
+
+class Row(Base):
+    __tablename__ = "rows"
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    name = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def with_rows(tmp_path, created_at, fn):
+    pytest.importorskip("aiosqlite")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pages.db'}")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as db:
+            db.add_all(Row(name=f"row{i}", created_at=ts) for i, ts in enumerate(created_at))
+            await db.commit()
+            return await fn(db)
+    finally:
+        await engine.dispose()
+
+
+async def all_pages(db, limit):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = await keyset_page(db, Row, [], limit, cursor=cursor)
+        pages.append([row.id for row in rows])
+        if cursor is None:
+            return pages
+
+
+# ------------------------- Cursors -------------------------
+@pytest.mark.parametrize("created_at", [
+    datetime(2026, 10, 19, 16, 47, 3, 552918, tzinfo=timezone.utc),
+    datetime(2026, 3, 29, 1, 30, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+])
+def test_cursor_round_trip_keeps_timezone(created_at):
+    row_id = uuid.uuid4()
+    decoded_at, decoded_id = decode_cursor(encode_cursor(created_at, row_id))
+    assert decoded_at == created_at
+    assert decoded_at.utcoffset() == created_at.utcoffset()
+    assert decoded_id == row_id
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", encode_cursor(datetime.now(timezone.utc), uuid.uuid4())[:-4]])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        decode_cursor(cursor)
+
+
+def test_invalid_cursor_is_a_400():
+    from routes.projects_router import get_all_projects
+    from routes.schemes.projects import ProjectListRequest
+
+    # The cursor is decoded before any statement runs
+    response = run(get_all_projects(ProjectListRequest(limit=10, cursor="not-a-cursor"), db=None, current_user={"id": "u", "role": 0}))
+    assert response.status_code == 400
+
+
+# ------------------------- Pages -------------------------
+def test_pages_cover_ties_on_created_at(tmp_path):
+    # A bulk insert gives every row of the batch the same now()
+    now = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+    created_at = [now] * 7 + [now - timedelta(seconds=1)] * 3
+
+    async def check(db):
+        pages = await all_pages(db, limit=3)
+        ids = [row_id for page in pages for row_id in page]
+        assert [len(page) for page in pages] == [3, 3, 3, 1]
+        assert len(set(ids)) == len(ids) == 10
+        return ids
+
+    run(with_rows(tmp_path, created_at, check))
+
+
+def test_pages_are_newest_first_and_stop_exactly(tmp_path):
+    now = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+    created_at = [now - timedelta(minutes=i) for i in range(6)]
+
+    async def check(db):
+        rows, cursor = await keyset_page(db, Row, [], 6)
+        assert cursor is None
+        assert [row.name for row in rows] == [f"row{i}" for i in range(6)]
+        assert await all_pages(db, limit=3) == [[r.id for r in rows[:3]], [r.id for r in rows[3:]]]
+
+    run(with_rows(tmp_path, created_at, check))
+
+
+# ------------------------- Totals -------------------------
+class FakeCount:
+    def __init__(self):
+        self.calls = 0
+
+    async def scalar(self, stmt):
+        self.calls += 1
+        return self.calls
+
+
+def test_count_cache_reuses_totals_within_ttl():
+    cache, db = CountCache(ttl_seconds=60), FakeCount()
+    assert run(cache.count(db, "a", Row, [])) == 1
+    assert run(cache.count(db, "a", Row, [])) == 1
+    assert db.calls == 1
+
+
+def test_count_cache_evicts_least_recently_used():
+    cache, db = CountCache(ttl_seconds=60, max_entries=2), FakeCount()
+    run(cache.count(db, "a", Row, []))
+    run(cache.count(db, "b", Row, []))
+    run(cache.count(db, "a", Row, []))  # a is now the most recently used
+    run(cache.count(db, "c", Row, []))  # evicts b only
+    assert list(cache._entries) == ["a", "c"]
+    assert db.calls == 3
@@ -0,0 +1,111 @@
+import asyncio
+
+from agents.single_flight import SingleFlight
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class Work:
+    """Counts its runs and blocks until released, recording a cancellation."""
+
+    def __init__(self):
+        self.runs = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.runs += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return "answer"
+
+
+async def settle():
+    # Let the started callers reach their await on the shared task
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+# ------------------------- Coalescing -------------------------
+def test_concurrent_callers_share_one_run():
+    async def check():
+        flights, work = SingleFlight(), Work()
+        callers = [asyncio.create_task(flights.do("q", work)) for _ in range(5)]
+        await settle()
+        work.release.set()
+        assert await asyncio.gather(*callers) == ["answer"] * 5
+        assert work.runs == 1
+        assert flights._flights == {}
+
+    run(check())
+
+
+def test_finished_key_starts_a_new_run():
+    async def check():
+        flights, work = SingleFlight(), Work()
+        work.release.set()
+        await flights.do("q", work)
+        await flights.do("q", work)
+        assert work.runs == 2
+
+    run(check())
+
+
+def test_error_reaches_every_waiter():
+    async def check():
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*(flights.do("q", fail) for _ in range(3)), return_exceptions=True)
+        assert [type(r) for r in results] == [ValueError] * 3
+
+    run(check())
+
+
+# ------------------------- Cancellation -------------------------
+def test_cancelling_one_waiter_keeps_the_others():
+    async def check():
+        flights, work = SingleFlight(), Work()
+        leader = asyncio.create_task(flights.do("q", work))
+        follower = asyncio.create_task(flights.do("q", work))
+        await settle()
+
+        leader.cancel()
+        await settle()
+        assert leader.cancelled()
+        assert not work.cancelled
+
+        work.release.set()
+        assert await follower == "answer"
+        assert work.runs == 1
+
+    run(check())
+
+
+def test_last_waiter_leaving_cancels_the_run():
+    async def check():
+        flights, work = SingleFlight(), Work()
+        callers = [asyncio.create_task(flights.do("q", work)) for _ in range(2)]
+        await settle()
+
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await settle()
+        assert work.cancelled
+        assert flights._flights == {}
+
+        # The key is free again: a new caller starts a fresh run
+        work.release.set()
+        assert await flights.do("q", work) == "answer"
+        assert work.runs == 2
+
+    run(check())
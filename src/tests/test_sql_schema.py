@@ -0,0 +1,64 @@
+import pytest
+
+from agents.sql_schema import SchemaSnapshot
+
+ALLOWED = {
+    "users": ["id", "username", "role", "created_at"],
+    "projects": ["id", "name", "description", "created_at"],
+    "project_users": ["id", "project_id", "user_id"],
+}
+
+
+@pytest.fixture
+def schema():
+    snapshot = SchemaSnapshot(None, ALLOWED)
+    # What _build derives from the reflected tables
+    snapshot._denied_names = ["hashed_password", "refresh_tokens", "chunks"]
+    return snapshot
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT username, role FROM users WHERE role = 0 LIMIT 5",
+    "SELECT count(*) FROM users",
+    "SELECT p.name, count(pu.user_id) AS members FROM projects p "
+    "JOIN project_users pu ON pu.project_id = p.id GROUP BY p.name ORDER BY members DESC",
+    "WITH recent AS (SELECT id, name FROM projects ORDER BY created_at DESC LIMIT 3) SELECT name FROM recent",
+    "SELECT u.username FROM users u WHERE u.id IN (SELECT user_id FROM project_users)",
+    "SELECT x.n FROM (SELECT username AS n FROM users) x",
+])
+def test_allowed_queries(schema, query):
+    assert schema.check_query(query) is None
+
+
+@pytest.mark.parametrize("query", [
+    # Whole-row references return every column, hidden ones included
+    "SELECT row_to_json(u) FROM users u",
+    "SELECT u FROM users u",
+    "SELECT users FROM users",
+    "SELECT to_jsonb(u)::text FROM users AS u",
+    "SELECT CAST(u AS text) FROM users u",
+    "SELECT (u).username FROM users u",
+    # Stars
+    "SELECT * FROM users",
+    "SELECT u.* FROM users u",
+    "SELECT row_to_json(t) FROM (SELECT * FROM users) t",
+    # Hidden columns and tables
+    "SELECT hashed_password FROM users",
+    "SELECT u.hashed_password FROM users u",
+    "SELECT username FROM users WHERE hashed_password LIKE 'a%'",
+    "SELECT token FROM refresh_tokens",
+    "SELECT content FROM chunks",
+    "SELECT usename FROM pg_catalog.pg_user",
+    "SELECT secret FROM users",
+    # SQL given as text, files
+    "SELECT query_to_xml('SELECT hashed_password FROM users', true, false, '')",
+    "SELECT table_to_xml('users', true, false, '')",
+    "SELECT pg_read_file('/etc/passwd')",
+    # Not a single SELECT
+    "DELETE FROM users",
+    "SELECT id FROM users; SELECT id FROM projects",
+    "SELEC id FROM users (",
+])
+def test_rejected_queries(schema, query):
+    error = schema.check_query(query)
+    assert error is not None and error.startswith("Error:")